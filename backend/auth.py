@@ -1,47 +1,182 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import base64
+import functools
+import hmac
+import json
+import logging
+import secrets
+import time
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select, bindparam
+from sqlalchemy.orm import Session, load_only
 from .database import get_db, User
 from .config import config
+from .utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
 SECRET_KEY = config.auth.get('jwt_secret_key',
                              'your-secret-key-here-change-in-production')
 ALGORITHM = config.auth.get('jwt_algorithm', 'HS256')
 ACCESS_TOKEN_EXPIRE_MINUTES = config.auth.get('jwt_expiration_minutes', 30)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Prebuilt decode arguments so verification does not rebuild them per call
+_SECRET_BYTES = SECRET_KEY.encode()
+_ALGORITHMS = (ALGORITHM, )
+_DECODE_OPTIONS = {
+    "verify_signature": True,
+    "verify_exp": True,
+    "verify_aud": False,
+    "verify_at_hash": False,
+    "require_exp": True,
+    "require_sub": True,
+}
+
+# HS256 minting state: the header segment is constant and the HMAC key
+# schedule is computed once, then copied per token
+_HEADER_B64 = base64.urlsafe_b64encode(
+    b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+_HMAC_PROTO = hmac.new(_SECRET_BYTES, digestmod='sha256')
+
 security = HTTPBearer()
 
 
+@functools.lru_cache(maxsize=1)
+def _pwd_ctx():
+    # passlib + bcrypt backend loading is slow; defer it to first use
+    from passlib.context import CryptContext
+    try:
+        import argon2  # noqa: F401
+    except ImportError:
+        return CryptContext(schemes=["bcrypt"],
+                            deprecated="auto",
+                            bcrypt__rounds=config.auth['bcrypt_rounds'])
+    # New hashes use argon2id; bcrypt stays verifiable and is rehashed on login
+    return CryptContext(
+        schemes=["argon2", "bcrypt"],
+        default="argon2",
+        deprecated="auto",
+        bcrypt__rounds=config.auth['bcrypt_rounds'],
+        argon2__type="ID",
+        argon2__time_cost=config.auth.get('argon2_time_cost', 2),
+        argon2__memory_cost=config.auth.get('argon2_memory_cost', 65536),
+        argon2__parallelism=config.auth.get('argon2_parallelism', 2),
+    )
+
+
+class _OrjsonCodec:
+    """json-module stand-in for python-jose backed by orjson.
+
+    Calls with options orjson does not understand (e.g. parse_int) are
+    passed through to the stdlib so behaviour stays identical.
+    """
+
+    def __init__(self, orjson):
+        self._orjson = orjson
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return self._orjson.loads(s)
+
+    def dumps(self, obj, separators=None, sort_keys=False, **kwargs):
+        if kwargs or separators not in (None, (",", ":")):
+            return json.dumps(obj,
+                              separators=separators,
+                              sort_keys=sort_keys,
+                              **kwargs)
+        option = self._orjson.OPT_SORT_KEYS if sort_keys else 0
+        return self._orjson.dumps(obj, option=option).decode()
+
+
+try:
+    from orjson import dumps as _dumps_compact
+except ImportError:
+
+    def _dumps_compact(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+
+@functools.lru_cache(maxsize=1)
+def _jose():
+    # Imported lazily; claims JSON goes through orjson when it is installed
+    from jose import jwt, jws, JWTError
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        jwt.json = jws.json = _OrjsonCodec(orjson)  # type: ignore[attr-defined]
+    return jwt, JWTError
+
+
+# Recent bcrypt verifications, keyed by HMAC(pepper, password + hash) so the
+# key is never equivalent to the plaintext. Without a configured pepper a
+# random one is drawn per process.
+_VERIFY_PEPPER = (config.get('auth.verify_cache_pepper')
+                  or secrets.token_hex(32)).encode()
+_verify_cache = TTLCache(maxsize=4096, ttl=60)
+
+_user_by_email_stmt = select(User).where(
+    User.email == bindparam("email")).limit(1)
+
+# Token-authenticated handlers only read what UserResponse exposes plus
+# is_admin, so leave hashed_password/updated_at deferred on that path.
+_token_user_columns = load_only(User.id, User.email, User.is_admin,
+                                User.avatar_url, User.created_at)
+_user_lite_stmt = _user_by_email_stmt.options(_token_user_columns)
+# Login only needs the hash to verify plus the email to sign the token
+_login_user_stmt = _user_by_email_stmt.options(
+    load_only(User.id, User.email, User.hashed_password, User.is_admin))
+
+# Decoded tokens, keyed by the raw JWT string: token -> (user_id, exp)
+_token_cache = TTLCache(maxsize=1024, ttl=60)
+
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    key = hmac.new(_VERIFY_PEPPER,
+                   plain_password.encode() + hashed_password.encode(),
+                   'sha256').digest()
+    verified = _verify_cache.get(key)
+    if verified is None:
+        verified = _pwd_ctx().verify(plain_password, hashed_password)
+        _verify_cache[key] = verified
+    return verified
 
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return _pwd_ctx().hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    lifetime = int(expires_delta.total_seconds()) if expires_delta else 900
+    to_encode = {**data, "exp": int(time.time()) + lifetime}
+    if ALGORITHM != "HS256":
+        jwt, _ = _jose()
+        return jwt.encode(to_encode, _SECRET_BYTES, algorithm=ALGORITHM)
+
+    body = _dumps_compact(to_encode)
+    signing_input = _HEADER_B64 + b"." + base64.urlsafe_b64encode(
+        body).rstrip(b"=")
+    mac = _HMAC_PROTO.copy()
+    mac.update(signing_input)
+    signature = base64.urlsafe_b64encode(mac.digest()).rstrip(b"=")
+    return (signing_input + b"." + signature).decode()
 
 
 def authenticate_user(db: Session, email: str, password: str):
-    user = db.query(User).filter(User.email == email).first()
+    user = db.execute(_login_user_stmt, {
+        "email": email
+    }).scalar_one_or_none()
     if not user:
         return False
     if not verify_password(password, user.hashed_password):
         return False
+    if _pwd_ctx().needs_update(user.hashed_password):
+        user.hashed_password = get_password_hash(password)
+        db.commit()
     return user
 
 
@@ -53,17 +188,7 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(credentials.credentials,
-                             SECRET_KEY,
-                             algorithms=[ALGORITHM])
-        email: Optional[str] = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    user = db.query(User).filter(User.email == email).first()
+    user = get_user_from_token(credentials.credentials, db)
     if user is None:
         raise credentials_exception
     return user
@@ -83,42 +208,60 @@ async def get_current_admin_user(
 
 
 def get_user_from_token(token: str, db: Session) -> Optional[User]:
-    """Get user from JWT token for server-side rendering"""
+    """Get user from JWT token, reusing recently decoded tokens"""
+    cached = _token_cache.get(token)
+    if cached is not None:
+        user_id, exp = cached
+        if exp > time.time():
+            user = db.get(User, user_id, options=[_token_user_columns])
+            if user is not None:
+                return user
+        _token_cache.pop(token)
+
+    jwt, JWTError = _jose()
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token,
+                             _SECRET_BYTES,
+                             algorithms=_ALGORITHMS,
+                             options=_DECODE_OPTIONS)
         email: Optional[str] = payload.get("sub")
         if email is None:
             return None
     except JWTError:
         return None
 
-    user = db.query(User).filter(User.email == email).first()
+    user = db.execute(_user_lite_stmt, {
+        "email": email
+    }).scalar_one_or_none()
+    if user is not None:
+        _token_cache[token] = (user.id, payload.get("exp", 0))
     return user
 
 
-def get_current_user_for_template(request: Request,
-                                  db: Session) -> Optional[User]:
-    """Get current user from request for template rendering"""
-    # Debug: print cookies
-    print(f"Request cookies: {request.cookies}")
+def invalidate_cached_token(token: str) -> None:
+    """Drop a token from the decode cache, e.g. on logout"""
+    _token_cache.pop(token)
 
-    # Try to get token from Authorization header
-    auth_header = request.headers.get("Authorization")
-    print(f"Authorization header: {auth_header}")
 
-    if auth_header and auth_header.startswith("Bearer "):
-        token = auth_header[7:]  # Remove "Bearer " prefix
-        user = get_user_from_token(token, db)
-        if user:
-            return user
+def get_current_user_for_template(
+        request: Request, db: Session = Depends(get_db)) -> Optional[User]:
+    """Get current user from request for template rendering
 
-    # Try to get token from cookies
-    token = request.cookies.get("access_token")
-    print(f"Token from cookie: {token}")
+    Usable as a dependency; the result is kept on ``request.state`` so it is
+    resolved at most once per request.
+    """
+    if hasattr(request.state, "current_user"):
+        return request.state.current_user
 
-    if token:
-        user = get_user_from_token(token, db)
-        if user:
-            return user
+    # Prefer the Authorization header so the cookie jar is only parsed
+    # when no valid Bearer token was sent
+    user = None
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        user = get_user_from_token(auth_header[7:], db)
+    if user is None:
+        token = request.cookies.get("access_token")
+        user = get_user_from_token(token, db) if token else None
 
-    return None
+    request.state.current_user = user
+    return user
@@ -1,25 +1,88 @@
-import yaml
 import os
+import copy
+import functools
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, Any, Union
-from dotenv import load_dotenv
+
+# Parsed config files keyed by absolute path: path -> (mtime_ns, size, data)
+_YAML_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_YAML_CACHE_SIZE = 16
+
+
+@functools.lru_cache(maxsize=256)
+def _env_key(key: str) -> str:
+    """Translate a dotted config key to its RINT_* environment variable name"""
+    return f"RINT_{key.upper().replace('.', '_')}"
 
 
 class Config:
 
+    # One instance per (path, mtime, size), so re-imports never re-parse
+    _instances: Dict[tuple, "Config"] = {}
+
+    def __new__(cls, config_path: str = "config.yml"):
+        try:
+            st = os.stat(config_path)
+        except OSError:
+            # Let __init__ report the missing file
+            return super().__new__(cls)
+        key = (os.path.abspath(config_path), st.st_mtime_ns, st.st_size)
+        instance = cls._instances.get(key)
+        if instance is None:
+            instance = super().__new__(cls)
+            cls._instances[key] = instance
+        return instance
+
     def __init__(self, config_path: str = "config.yml"):
+        if getattr(self, '_initialized', False):
+            return
         self.config_path = config_path
         # Load .env file if it exists
-        load_dotenv()
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except ImportError:
+            pass
+        self._env_overrides = self._snapshot_env()
         self._config = self._load_config()
+        self._initialized = True
 
     def _load_config(self) -> Dict[str, Any]:
         if not os.path.exists(self.config_path):
             raise FileNotFoundError(
                 f"Config file not found: {self.config_path}")
 
+        st = os.stat(self.config_path)
+        key = os.path.abspath(self.config_path)
+        cached = _YAML_CACHE.get(key)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            _YAML_CACHE.move_to_end(key)
+            return copy.deepcopy(cached[2])
+
+        import yaml
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
         with open(self.config_path, 'r') as file:
-            return yaml.safe_load(file)
+            data = yaml.load(file, Loader=loader)
+
+        _YAML_CACHE[key] = (st.st_mtime_ns, st.st_size, data)
+        _YAML_CACHE.move_to_end(key)
+        while len(_YAML_CACHE) > _YAML_CACHE_SIZE:
+            _YAML_CACHE.popitem(last=False)
+        return copy.deepcopy(data)
+
+    _CACHED_SECTIONS = ('server', 'database', 'dvc_config', 'dvc_remote',
+                        'auth', 'cors', 'logging', 'timing_debug')
+
+    def invalidate(self) -> None:
+        """Drop memoized sections and re-read the environment on next access"""
+        for name in self._CACHED_SECTIONS:
+            self.__dict__.pop(name, None)
+        self._env_overrides = self._snapshot_env()
+
+    @staticmethod
+    def _snapshot_env() -> Dict[str, str]:
+        return {k: v for k, v in os.environ.items() if k.startswith("RINT_")}
 
     def _get_env_override(self, key: str) -> Union[str, None]:
         """Get environment variable override for a configuration key.
@@ -27,9 +90,7 @@ class Config:
         Environment variables follow the pattern: RINT_{SECTION}_{KEY}
         For nested keys like 'server.host', the env var is RINT_SERVER_HOST
         """
-        # Convert dot notation to env var format
-        env_key = f"RINT_{key.upper().replace('.', '_')}"
-        return os.getenv(env_key)
+        return self._env_overrides.get(_env_key(key))
 
     def get(self, key: str, default=None):
         """Get configuration value with environment variable override.
@@ -72,7 +133,7 @@ class Config:
 
         return value
 
-    @property
+    @functools.cached_property
     def server(self) -> Dict[str, Any]:
         """Get server configuration with environment variable overrides"""
         config = self._config.get('server', {})
@@ -83,7 +144,7 @@ class Config:
             'reload': self.get('server.reload', config.get('reload', True)),
         }
 
-    @property
+    @functools.cached_property
     def database(self) -> Dict[str, Any]:
         """Get database configuration with environment variable overrides"""
         config = self._config.get('database', {})
@@ -92,7 +153,7 @@ class Config:
             'echo': self.get('database.echo', config.get('echo', False)),
         }
 
-    @property
+    @functools.cached_property
     def dvc_config(self) -> Dict[str, Any]:
         """Get DVC configuration with environment variable overrides"""
         config = self._config.get('dvc', {})
@@ -103,10 +164,18 @@ class Config:
             'upload_directory': self.get('dvc.upload_directory', config.get('upload_directory', '/tmp/rdm/uploads')),
             'max_file_size': self.get('dvc.max_file_size', config.get('max_file_size', 104857600)),
             'allowed_extensions': self.get('dvc.allowed_extensions', config.get('allowed_extensions', [".csv", ".json", ".txt", ".xlsx", ".parquet", ".h5", ".pkl", ".py", ".ipynb"])),
+            'pack_folder_threshold': self.get('dvc.pack_folder_threshold', config.get('pack_folder_threshold', 0)),
+            'push_jobs': self.get('dvc.push_jobs', config.get('push_jobs')),
+            'upload_spool_size': self.get('dvc.upload_spool_size', config.get('upload_spool_size', 1048576)),
             'remote_server': self.dvc_remote,
         }
 
     @property
+    def dvc(self) -> Dict[str, Any]:
+        """Alias of ``dvc_config`` for callers using the YAML section name"""
+        return self.dvc_config
+
+    @functools.cached_property
     def dvc_remote(self) -> Dict[str, Any]:
         """Get DVC remote server configuration with environment variable overrides"""
         config = self._config.get('dvc', {}).get('remote_server', {})
@@ -117,7 +186,8 @@ class Config:
                 'method': self.get('dvc.remote_server.auth.method', config.get('auth', {}).get('method', 'database')),
                 'database_auth': {
                     'require_admin': self.get('dvc.remote_server.auth.database_auth.require_admin', config.get('auth', {}).get('database_auth', {}).get('require_admin', False)),
-                    'allowed_users': self.get('dvc.remote_server.auth.database_auth.allowed_users', config.get('auth', {}).get('database_auth', {}).get('allowed_users', [])),
+                    # frozenset: probed on every DVC login
+                    'allowed_users': frozenset(self.get('dvc.remote_server.auth.database_auth.allowed_users', config.get('auth', {}).get('database_auth', {}).get('allowed_users', []))),
                 },
                 'basic_auth': {
                     'username': self.get('dvc.remote_server.auth.basic_auth.username', config.get('auth', {}).get('basic_auth', {}).get('username', 'dvc_user')),
@@ -133,7 +203,7 @@ class Config:
             'connect_timeout': self.get('dvc.remote_server.connect_timeout', config.get('connect_timeout', 300)),
         }
 
-    @property
+    @functools.cached_property
     def auth(self) -> Dict[str, Any]:
         """Get authentication configuration with environment variable overrides"""
         config = self._config.get('auth', {})
@@ -143,9 +213,13 @@ class Config:
             'jwt_expiration_minutes': self.get('auth.jwt_expiration_minutes', config.get('jwt_expiration_minutes', 1440)),
             'password_min_length': self.get('auth.password_min_length', config.get('password_min_length', 8)),
             'email_suffix_regex': self.get('auth.email_suffix_regex', config.get('email_suffix_regex', '.*@hillstonenet\\.com$|.*@Hillstonenet\\.com$')),
+            'bcrypt_rounds': self.get('auth.bcrypt_rounds', config.get('bcrypt_rounds', 12)),
+            'argon2_time_cost': self.get('auth.argon2_time_cost', config.get('argon2_time_cost', 2)),
+            'argon2_memory_cost': self.get('auth.argon2_memory_cost', config.get('argon2_memory_cost', 65536)),
+            'argon2_parallelism': self.get('auth.argon2_parallelism', config.get('argon2_parallelism', 2)),
         }
 
-    @property
+    @functools.cached_property
     def cors(self) -> Dict[str, Any]:
         """Get CORS configuration with environment variable overrides"""
         config = self._config.get('cors', {})
@@ -155,7 +229,7 @@ class Config:
             'allowed_headers': self.get('cors.allowed_headers', config.get('allowed_headers', ["*"])),
         }
 
-    @property
+    @functools.cached_property
     def logging(self) -> Dict[str, Any]:
         """Get logging configuration with environment variable overrides"""
         config = self._config.get('logging', {})
@@ -165,7 +239,7 @@ class Config:
             'file': self.get('logging.file', config.get('file', 'log/app.log')),
         }
 
-    @property
+    @functools.cached_property
     def timing_debug(self) -> Dict[str, Any]:
         """Get timing debug configuration with environment variable overrides"""
         config = self._config.get('timing_debug', {})
@@ -1,86 +1,113 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Boolean, ForeignKey, LargeBinary
-from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy import create_engine, event, inspect, Index, Text, ForeignKey
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy.orm import Session, sessionmaker, relationship
 from sqlalchemy.sql import func
 from datetime import datetime
-import time
+from typing import List, Optional
+import itertools
 import logging
 from .config import config
-try:
-    from .utils.timing import timing_logger, log_timing
-except ImportError:
-    # Fallback if utils module is not available
-    def timing_logger(func):
-        return func
-    def log_timing(message, start_time=None):
-        return time.time()
 
 DATABASE_URL = config.database.get('url', 'sqlite:///./rint_data_manager.db')
 
-# Set up logging for timing
+# Set up logging
 logger = logging.getLogger(__name__)
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+_is_sqlite = DATABASE_URL.startswith("sqlite")
+_engine_kwargs = {
+    "pool_pre_ping": True,
+    "query_cache_size": 1200,
+    "connect_args": {"check_same_thread": False} if _is_sqlite else {},
+}
+if ":memory:" not in DATABASE_URL:
+    # In-memory SQLite uses SingletonThreadPool, which has no overflow/recycle
+    _engine_kwargs.update(pool_size=20, max_overflow=40, pool_recycle=1800)
+
+engine = create_engine(DATABASE_URL, **_engine_kwargs)
+
+if _is_sqlite:
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
+class Base(DeclarativeBase):
+    pass
 
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True, nullable=False)
-    hashed_password = Column(String, nullable=False)
-    avatar_url = Column(String, nullable=True)
-    is_admin = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    email: Mapped[str] = mapped_column(unique=True, index=True)
+    hashed_password: Mapped[str]
+    avatar_url: Mapped[Optional[str]]
+    is_admin: Mapped[Optional[bool]] = mapped_column(default=False)
+    created_at: Mapped[Optional[datetime]] = mapped_column(default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        default=func.now(), onupdate=func.now())
+
+    data_items: Mapped[List["DataItem"]] = relationship(back_populates="user")
 
-    data_items = relationship("DataItem", back_populates="user")
+
+# DataItem.dvc_status: uploads stay pending until the background push to the
+# DVC remote lands; rows registered by a client-side dvc push start as pushed
+DVC_PENDING = "pending"
+DVC_PUSHED = "pushed"
+DVC_FAILED = "failed"
 
 
 class DataItem(Base):
     __tablename__ = "data_items"
-
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
-    description = Column(Text, nullable=True)
-    project = Column(String, nullable=True)
-    source = Column(String, nullable=False)
-    file_path = Column(String, nullable=False)
-    hash = Column(String, nullable=True)
-    file_size = Column(Integer, nullable=True)
-    file_type = Column(String, nullable=True)
-    is_folder = Column(Boolean, default=False)
-    file_count = Column(Integer, nullable=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    parent_id = Column(Integer, ForeignKey("data_items.id"), nullable=True)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
-
-    user = relationship("User", back_populates="data_items")
-    parent = relationship("DataItem",
-                          remote_side=[id],
-                          back_populates="children")
-    children = relationship("DataItem", back_populates="parent")
+    # Serves per-user listings as an index range seek on (user_id, id)
+    __table_args__ = (Index("ix_data_items_user_id_id", "user_id", "id"), )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    name: Mapped[str]
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    project: Mapped[Optional[str]]
+    source: Mapped[str]
+    file_path: Mapped[str]
+    hash: Mapped[Optional[str]] = mapped_column(index=True)
+    file_size: Mapped[Optional[int]]
+    file_type: Mapped[Optional[str]]
+    is_folder: Mapped[Optional[bool]] = mapped_column(default=False)
+    file_count: Mapped[Optional[int]]
+    dvc_status: Mapped[str] = mapped_column(default=DVC_PUSHED,
+                                            server_default=DVC_PUSHED)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    parent_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("data_items.id"))
+    created_at: Mapped[Optional[datetime]] = mapped_column(default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(
+        default=func.now(), onupdate=func.now())
+
+    user: Mapped["User"] = relationship(back_populates="data_items")
+    parent: Mapped[Optional["DataItem"]] = relationship(
+        remote_side=[id], back_populates="children")
+    children: Mapped[List["DataItem"]] = relationship(back_populates="parent")
 
 
 class UploadedMetadata(Base):
     __tablename__ = "uploaded_metadata"
 
-    id = Column(Integer, primary_key=True, index=True)
-    file_hash = Column(String, nullable=False,
-                       index=True)  # To match with data_items.hash
-    original_filename = Column(String,
-                               nullable=False)  # From .dvc file parsing
-    host_ip = Column(String, nullable=True)  # From HTTP request client
-    username = Column(String, nullable=True)  # From form field
-    created_at = Column(DateTime, default=func.now())
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    # To match with data_items.hash
+    file_hash: Mapped[str] = mapped_column(index=True)
+    original_filename: Mapped[str]  # From .dvc file parsing
+    host_ip: Mapped[Optional[str]]  # From HTTP request client
+    username: Mapped[Optional[str]]  # From form field
+    created_at: Mapped[Optional[datetime]] = mapped_column(default=func.now())
 
     # Relationship to DataItem (optional, for easy joins)
-    data_item = relationship(
-        "DataItem",
+    data_item: Mapped[List["DataItem"]] = relationship(
         foreign_keys=[file_hash],
         primaryjoin="UploadedMetadata.file_hash == foreign(DataItem.hash)")
 
@@ -88,13 +115,55 @@ class UploadedMetadata(Base):
 class UploadLog(Base):
     __tablename__ = "upload_logs"
 
-    id = Column(Integer, primary_key=True, index=True)
-    data_item_id = Column(Integer, ForeignKey("data_items.id"), nullable=False)
-    action = Column(String, nullable=False)
-    metadata_info = Column(Text, nullable=True)
-    timestamp = Column(DateTime, default=func.now())
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    data_item_id: Mapped[int] = mapped_column(ForeignKey("data_items.id"))
+    action: Mapped[str]
+    metadata_info: Mapped[Optional[str]] = mapped_column(Text)
+    timestamp: Mapped[Optional[datetime]] = mapped_column(default=func.now())
+
+    data_item: Mapped["DataItem"] = relationship()
+
+
+# Bumped by every commit that wrote users or data items; cached listings
+# key on it so they are dropped as soon as anything they show changes.
+# Bumping at commit rather than flush keeps a concurrent reader from caching
+# pre-commit rows under the new generation.
+_write_generation = 0
+_LISTED_MODELS = (User, DataItem)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_flushed_write(session, flush_context):
+    # new/dirty/deleted still hold the pre-flush state here
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, _LISTED_MODELS):
+            session.info["bump_write_generation"] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_statement_write(orm_execute_state):
+    # Core-style update()/delete() statements never pass through a flush
+    mapper = orm_execute_state.bind_mapper
+    if ((orm_execute_state.is_update or orm_execute_state.is_delete)
+            and mapper is not None and issubclass(mapper.class_, _LISTED_MODELS)):
+        orm_execute_state.session.info["bump_write_generation"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_write_generation(session):
+    global _write_generation
+    if session.info.pop("bump_write_generation", False):
+        _write_generation += 1
 
-    data_item = relationship("DataItem")
+
+@event.listens_for(Session, "after_rollback")
+def _forget_write(session):
+    session.info.pop("bump_write_generation", None)
+
+
+def get_write_generation() -> int:
+    return _write_generation
 
 
 def get_db():
@@ -105,35 +174,38 @@ def get_db():
         db.close()
 
 
-def create_tables():
-    Base.metadata.create_all(bind=engine)
+def release_connection(db: Session) -> None:
+    """Hand the session's pooled connection back before a long non-DB stretch
 
+    Request sessions live as long as the request, and the authentication
+    query leaves a connection checked out. Handlers that then spend a long
+    time on other work (reading a streamed body, copying spooled uploads to
+    disk, running ``dvc add``) call this so the connection is not held all
+    along. Objects already loaded stay readable (detached); the next query
+    checks out a fresh connection.
+    """
+    db.close()
 
-@timing_logger
-def ensure_tables_exist():
-    """Check if tables exist and create them if they don't"""
-    log_timing("ensure_tables_exist - starting table existence check")
-    start_time = log_timing("ensure_tables_exist - creating database session")
-    
-    try:
-        # Try to query the first user to see if tables exist
-        db = SessionLocal()
-        db_time = log_timing("ensure_tables_exist - database session created", start_time)
-        
-        try:
-            query_start = log_timing("ensure_tables_exist - executing User.first() query")
-            db.query(User).first()
-            log_timing("ensure_tables_exist - User.first() query completed", query_start)
-        finally:
-            close_start = log_timing("ensure_tables_exist - closing database session")
-            db.close()
-            log_timing("ensure_tables_exist - database session closed", close_start)
-            
-        log_timing("ensure_tables_exist - tables exist, total check time", start_time)
-    except Exception as e:
-        log_timing(f"ensure_tables_exist - exception caught: {e}, creating tables")
-        # If there's an error, tables likely don't exist, so create them
-        create_start = log_timing("ensure_tables_exist - creating tables")
-        create_tables()
-        log_timing("ensure_tables_exist - tables created", create_start)
-        log_timing("ensure_tables_exist - total time with table creation", start_time)
+
+def _add_dvc_status_column():
+    """Add data_items.dvc_status to databases created before it existed
+
+    The project has no migration environment; this one column is added in
+    place, and its server default marks every existing row as pushed.
+    """
+    columns = inspect(engine).get_columns(DataItem.__tablename__)
+    if any(c['name'] == 'dvc_status' for c in columns):
+        return
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "ALTER TABLE data_items ADD COLUMN dvc_status VARCHAR "
+            f"NOT NULL DEFAULT '{DVC_PUSHED}'")
+
+
+def create_tables():
+    Base.metadata.create_all(bind=engine)
+    _add_dvc_status_column()
+    # create_all skips existing tables, so add indexes introduced later
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
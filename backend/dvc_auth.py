@@ -1,14 +1,67 @@
-import base64
-from typing import Optional, List, Union, Dict, Any
-from fastapi import HTTPException, status, Depends
+import hashlib
+from datetime import datetime
+from typing import Optional, Union, Dict, Any, Tuple, NamedTuple
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, bindparam
 from sqlalchemy.orm import Session
-from .database import get_db, User
+from .database import User
 from .auth import verify_password
 from .config import config
+from .utils.cache import TTLCache
+
+try:
+    # SIMD base64 codec; same signature as the stdlib function
+    from pybase64 import b64decode
+except ImportError:
+    from base64 import b64decode
+
+class AuthUser(NamedTuple):
+    """The user fields DVC remote handlers read, without an ORM instance"""
+    id: int
+    email: str
+    is_admin: Optional[bool]
+    created_at: Optional[datetime]
+
+
+_auth_user_columns = (User.id, User.email, User.is_admin, User.created_at)
+_user_auth_stmt = select(*_auth_user_columns, User.hashed_password).where(
+    User.email == bindparam('email')).limit(1)
+_user_by_id_stmt = select(*_auth_user_columns).where(
+    User.id == bindparam('user_id'))
+
+# Successful database logins, keyed by a digest of the raw Authorization
+# header: digest -> user id. Skips the email lookup and password verify for
+# the many small requests a single DVC push/pull issues.
+_auth_cache = TTLCache(maxsize=10_000, ttl=60)
+
+
+def _auth_cache_key(authorization: str) -> bytes:
+    return hashlib.blake2b(authorization.encode(), digest_size=16).digest()
+
+
+def _split_authorization(authorization: str) -> Tuple[str, str]:
+    """Split ``"<scheme> <credentials>"`` without building a list"""
+    sp = authorization.find(' ')
+    if sp <= 0:
+        raise ValueError("Malformed Authorization header")
+    return authorization[:sp], authorization[sp + 1:].strip()
+
+
+def _decode_basic_credentials(credentials: str) -> Tuple[str, str]:
+    """Return (username, password) from a Basic credentials token"""
+    raw = b64decode(credentials)
+    i = raw.index(b':')
+    return raw[:i].decode('utf-8'), raw[i + 1:].decode('utf-8')
+
+
+def invalidate_dvc_auth_cache() -> None:
+    """Forget cached DVC logins, e.g. after a password change"""
+    _auth_cache.clear()
 
 
 def verify_dvc_auth(authorization: Optional[str], x_dvc_token: Optional[str],
-                    db: Session) -> Optional[User]:
+                    db: Session) -> Optional[AuthUser]:
     """Verify DVC remote authentication using database users"""
     # Get auth config from unified structure
     dvc_config = config.dvc_config
@@ -36,41 +89,71 @@ def verify_dvc_auth(authorization: Optional[str], x_dvc_token: Optional[str],
                             detail="Invalid authentication method")
 
 
+async def verify_dvc_auth_async(authorization: Optional[str],
+                                x_dvc_token: Optional[str],
+                                db: Session) -> Optional[AuthUser]:
+    """verify_dvc_auth for async handlers, run on the threadpool.
+
+    Password hashing releases the GIL, so cold logins from parallel DVC
+    requests use all cores instead of stalling the event loop. A process
+    pool would add pickling and worker start-up for no extra parallelism,
+    and the lookup needs this request's session, which cannot cross
+    processes.
+    """
+    return await run_in_threadpool(verify_dvc_auth, authorization,
+                                   x_dvc_token, db)
+
+
 def verify_database_auth(authorization: Optional[str], db: Session,
-                         auth_config: Dict[str, Any]) -> User:
+                         auth_config: Dict[str, Any]) -> AuthUser:
     """Verify authentication using database users"""
     if not authorization:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail="Authorization header required")
 
+    cache_key = _auth_cache_key(authorization)
+    user_id = _auth_cache.get(cache_key)
+    if user_id is not None:
+        row = db.execute(_user_by_id_stmt, {'user_id': user_id}).first()
+        if row is not None:
+            user = AuthUser(*row)
+            if not is_user_allowed_for_dvc(user, auth_config):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="User not authorized for DVC remote access")
+            return user
+        _auth_cache.pop(cache_key)
+
     try:
-        scheme, credentials = authorization.split()
+        scheme, credentials = _split_authorization(authorization)
         if scheme.lower() != 'basic':
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Only Basic authentication supported for database auth")
 
-        decoded = base64.b64decode(credentials).decode('utf-8')
-        email, password = decoded.split(':', 1)
+        email, password = _decode_basic_credentials(credentials)
 
         # Find user in database
-        user = db.query(User).filter(User.email == email).first()
+        row = db.execute(_user_auth_stmt, {'email': email}).first()
 
-        if not user:
+        if not row:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                 detail="Invalid credentials")
 
         # Verify password
-        if not verify_password(password, user.hashed_password):
+        if not verify_password(password, row.hashed_password):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                 detail="Invalid credentials")
 
+        user = AuthUser(*row[:4])
+
         # Check if user is allowed to access DVC remote
         if not is_user_allowed_for_dvc(user, auth_config):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="User not authorized for DVC remote access")
 
+        _auth_cache[cache_key] = user.id
         return user
 
     except ValueError:
@@ -81,7 +164,8 @@ def verify_database_auth(authorization: Optional[str], db: Session,
                             detail="Authentication failed")
 
 
-def is_user_allowed_for_dvc(user: User, auth_config: Dict[str, Any]) -> bool:
+def is_user_allowed_for_dvc(user: Union[User, AuthUser],
+                            auth_config: Dict[str, Any]) -> bool:
     """Check if user is allowed to access DVC remote"""
     database_config = auth_config.get('database_auth', {})
 
@@ -90,7 +174,7 @@ def is_user_allowed_for_dvc(user: User, auth_config: Dict[str, Any]) -> bool:
         return bool(user.is_admin)
 
     # Check if user is in allowed users list
-    allowed_users = database_config.get('allowed_users', [])
+    allowed_users = database_config.get('allowed_users', ())
     if allowed_users:
         return user.email in allowed_users
 
@@ -105,12 +189,11 @@ def verify_basic_auth(authorization: Optional[str],
         return False
 
     try:
-        scheme, credentials = authorization.split()
+        scheme, credentials = _split_authorization(authorization)
         if scheme.lower() != 'basic':
             return False
 
-        decoded = base64.b64decode(credentials).decode('utf-8')
-        username, password = decoded.split(':', 1)
+        username, password = _decode_basic_credentials(credentials)
 
         basic_config = auth_config.get('basic_auth', {})
 
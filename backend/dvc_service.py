@@ -1,76 +1,519 @@
+import asyncio
+import contextlib
+import errno
+import functools
+import hashlib
+import io
+import mmap
 import os
+import posixpath
 import subprocess
-import yaml
+import tarfile
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass, field
 import shutil
-from pathlib import Path
-from typing import Optional, Dict, Any, List
+from pathlib import Path, PurePosixPath
+from typing import Optional, Dict, Any, AsyncIterator, List, Set, Tuple
 import time
 import logging
 
+from dvc.exceptions import DvcException, UploadError
+from dvc.repo import Repo
+from dvc_data.hashfile.hash_info import HashInfo
 from fastapi import UploadFile, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from scmrepo.git import Git
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
 from .config import config
-from .database import User, DataItem
+from .database import (SessionLocal, User, DataItem, DVC_PENDING, DVC_PUSHED,
+                       DVC_FAILED)
 from .schemas import DataItemCreate, DataItemResponse
 try:
-    from .utils.timing import timing_logger, log_timing
+    from .utils.timing import timing_logger, TimingBlock
 except ImportError:
     # Fallback if utils module is not available
     def timing_logger(func):
         return func
-    def log_timing(message, start_time=None):
-        return time.time()
+    def TimingBlock(name):
+        return contextlib.nullcontext()
 
 # Set up logging for timing
 logger = logging.getLogger(__name__)
 
 UPLOAD_DIR = config.dvc_config.get('upload_directory', '/tmp/rdm/uploads')
 DVC_STORAGE_DIR = config.dvc_config.get('storage_path', '/opt/dvc_storage')
+# DVC's content-addressed object store, sharded by the first two hash chars:
+# files/md5/<hash[:2]>/<hash[2:]>
+DVC_FILES_DIR = os.path.join(config.get_dvc_storage_path(), "files", "md5")
 DVC_REMOTE_NAME = config.dvc_config.get('remote_name', 'local_storage')
 DVC_UPLOADS_PROJECT = config.dvc_config.get('uploads_dvc_project',
                                             '/tmp/rdm/uploads')
 
-def run_dvc_command(args, cwd=None, check=True, capture_output=False, text=False):
-    """Run DVC command using uv run to ensure proper environment."""
-    cmd = ['uv', 'run', 'dvc'] + args
-    return subprocess.run(cmd, cwd=cwd, check=check, capture_output=capture_output, text=text)
+PACK_FOLDER_THRESHOLD = config.dvc_config.get('pack_folder_threshold', 0)
+# No default to coerce against, so an env override arrives as a string
+_push_jobs = config.dvc_config.get('push_jobs')
+DVC_PUSH_JOBS = int(_push_jobs) if _push_jobs else None
+
+# DVC runs in-process against one long-lived Repo; the lock serialises
+# operations on it since Repo objects are not thread-safe. _dvc_repo is
+# only published once the project and its remote are fully set up.
+_dvc_repo = None
+_dvc_lock = threading.RLock()
+
+
+def _git_init(path: str) -> None:
+    """Create the git repo DVC needs, through scmrepo when it can"""
+    if os.path.isdir(os.path.join(path, ".git")):
+        return
+    try:
+        Git.init(path).close()
+    except Exception:
+        # Output is only interesting on failure, where stderr is kept
+        subprocess.run(["git", "init"],
+                       check=True,
+                       cwd=path,
+                       stdout=subprocess.DEVNULL,
+                       stderr=subprocess.PIPE)
 
 
 def ensure_dvc_repo():
-    # Ensure uploads DVC project exists
-    if not os.path.exists(DVC_UPLOADS_PROJECT):
+    """Return the uploads DVC repo, initialising it and its remote if needed"""
+    global _dvc_repo
+    repo = _dvc_repo
+    if repo is not None:
+        return repo
+
+    with _dvc_lock:
+        if _dvc_repo is not None:
+            return _dvc_repo
+
+        # Ensure uploads DVC project exists
         os.makedirs(DVC_UPLOADS_PROJECT, exist_ok=True)
 
-    # Initialize DVC in uploads project if not already initialized
-    if not os.path.exists(os.path.join(DVC_UPLOADS_PROJECT, ".dvc")):
-        Path(DVC_UPLOADS_PROJECT).mkdir(parents=True, exist_ok=True)
-        subprocess.run(["git", "init"], check=True, cwd=DVC_UPLOADS_PROJECT)
-        run_dvc_command(["init", "-f", "-q"], cwd=DVC_UPLOADS_PROJECT)
+        # Initialize DVC in uploads project if not already initialized
+        if not os.path.isdir(os.path.join(DVC_UPLOADS_PROJECT, ".dvc")):
+            _git_init(DVC_UPLOADS_PROJECT)
+            repo = Repo.init(DVC_UPLOADS_PROJECT, force=True)
+        else:
+            repo = Repo(DVC_UPLOADS_PROJECT)
+        # Don't print "git add ..." hints after every add
+        repo.scm_context.quiet = True
 
-    # Ensure storage directory exists
-    if not os.path.exists(DVC_STORAGE_DIR):
+        # Ensure storage directory exists
         os.makedirs(DVC_STORAGE_DIR, exist_ok=True)
 
-    # Check and add remote in uploads DVC project
-    remote_check = run_dvc_command(["remote", "list"],
-                                  capture_output=True,
-                                  text=True,
-                                  cwd=DVC_UPLOADS_PROJECT)
-    if DVC_REMOTE_NAME not in remote_check.stdout:
-        run_dvc_command([
-            "remote", "add", "-d", DVC_REMOTE_NAME,
-            os.path.abspath(DVC_STORAGE_DIR)
-        ],
-                       cwd=DVC_UPLOADS_PROJECT)
+        # Check and add remote in uploads DVC project
+        if DVC_REMOTE_NAME not in repo.config["remote"]:
+            with repo.config.edit() as conf:
+                conf["remote"][DVC_REMOTE_NAME] = {
+                    "url": os.path.abspath(DVC_STORAGE_DIR)
+                }
+                conf["core"]["remote"] = DVC_REMOTE_NAME
+
+        _dvc_repo = repo
+        return repo
 
 
-async def save_upload_file(upload_file: UploadFile, destination: Path):
+def warm_up_dvc() -> None:
+    """Open the uploads repo and its remote filesystem ahead of the first upload
+
+    fsspec caches filesystem instances, so the client (and its connection
+    pool) created here is the one later pushes reuse.
+    """
+    try:
+        with _dvc_lock:
+            odb = ensure_dvc_repo().cloud.get_remote_odb(DVC_REMOTE_NAME)
+            odb.fs.exists(odb.path)
+    except Exception:
+        logger.warning("Could not warm up DVC remote %s",
+                       DVC_REMOTE_NAME,
+                       exc_info=True)
+
+
+# Pushes to the remote run off the request path. A single worker collects
+# everything queued within _PUSH_WINDOW seconds and pushes it in one call,
+# so concurrent uploads share one remote/cache scan. The worker transfers
+# the added outputs' cache objects directly instead of calling repo.push,
+# so it needs neither _dvc_lock nor DVC's repo lock and uploads running
+# dvc add are never held up behind a slow or retrying push.
+_PUSH_WINDOW = 0.5
+# A failed push is tried again after _PUSH_RETRY_DELAY seconds, doubling
+# each time, before the batch is given up on
+_PUSH_ATTEMPTS = 3
+_PUSH_RETRY_DELAY = 1.0
+
+
+@dataclass
+class _PendingPush:
+    hash_info: Optional[HashInfo]
+    done: Future = field(default_factory=Future)
+
+
+_push_queue: "queue.Queue[_PendingPush]" = queue.Queue()
+_push_thread: Optional[threading.Thread] = None
+_push_thread_lock = threading.Lock()
+
+
+def _push_worker() -> None:
+    while True:
+        batch = [_push_queue.get()]
+        time.sleep(_PUSH_WINDOW)
+        while True:
+            try:
+                batch.append(_push_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        objs = {p.hash_info for p in batch if p.hash_info is not None}
+        try:
+            if objs:
+                _push_with_retry(objs)
+        except Exception as e:
+            logger.exception("DVC push failed for %s",
+                             ", ".join(sorted(h.value for h in objs)))
+            for pending in batch:
+                pending.done.set_exception(e)
+        else:
+            for pending in batch:
+                pending.done.set_result(None)
+
+
+def _push_with_retry(objs: Set[HashInfo]) -> None:
+    cloud = ensure_dvc_repo().cloud
+    for attempt in range(_PUSH_ATTEMPTS):
+        try:
+            # .dir objects are expanded to their entries by the transfer
+            result = cloud.push(objs, jobs=DVC_PUSH_JOBS,
+                                remote=DVC_REMOTE_NAME)
+            if result.failed:
+                raise UploadError(len(result.failed))
+            return
+        except Exception:
+            if attempt + 1 == _PUSH_ATTEMPTS:
+                raise
+            logger.warning("DVC push failed for %s, retrying",
+                           ", ".join(sorted(h.value for h in objs)),
+                           exc_info=True)
+            time.sleep(_PUSH_RETRY_DELAY * 2**attempt)
+
+
+def _queue_push(hash_info: Optional[HashInfo]) -> Future:
+    global _push_thread
+    with _push_thread_lock:
+        if _push_thread is None:
+            _push_thread = threading.Thread(target=_push_worker,
+                                            name="dvc-push",
+                                            daemon=True)
+            _push_thread.start()
+    pending = _PendingPush(hash_info)
+    _push_queue.put(pending)
+    return pending.done
+
+
+def _seed_dvc_hashes(repo, known_hashes: Dict[Path, str]) -> None:
+    """Record MD5s computed while saving uploads in DVC's state database
+
+    ``dvc add`` consults the state (keyed by path, inode, mtime and size)
+    before hashing, so seeded files are not read a second time.
+    """
+    from dvc_objects.fs.local import localfs
+
+    repo.state.save_many(((os.path.abspath(path), HashInfo("md5", md5), None)
+                          for path, md5 in known_hashes.items()), localfs)
+
+
+def dvc_add_and_push(
+    path: Path,
+    known_hashes: Optional[Dict[Path, str]] = None
+) -> Tuple[str, Optional[int], Optional[int], Future]:
+    """Track ``path`` in the uploads project and queue a push to the remote
+
+    ``dvc add`` stays synchronous and its output's md5, size and file count
+    are returned as recorded in the .dvc file; the push completes in the
+    background and is reported through the returned future.
+    """
+    with _dvc_lock:
+        repo = ensure_dvc_repo()
+        if known_hashes:
+            _seed_dvc_hashes(repo, known_hashes)
+        stage, = repo.add(str(path))
+    out = stage.outs[0]
+    pushed = _queue_push(out.hash_info)
+    return out.hash_info.value, out.meta.size, out.meta.nfiles, pushed
+
+
+def _record_push_result(item_id: int, pushed: Future) -> None:
+    """Move a pending data item to pushed or failed once its push settles"""
+    outcome = DVC_FAILED if pushed.exception() else DVC_PUSHED
+    db = SessionLocal()
     try:
-        with destination.open("wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
+        db.execute(
+            update(DataItem).where(
+                DataItem.id == item_id,
+                DataItem.dvc_status == DVC_PENDING).values(
+                    dvc_status=outcome).execution_options(
+                        synchronize_session=False))
+        db.commit()
+    except Exception:
+        logger.exception("Could not record DVC push status %s for item %s",
+                         outcome, item_id)
+    finally:
+        db.close()
+
+
+def _track_push(item_id: int, pushed: Future) -> None:
+    # Runs on the push worker, or right here if the push already finished
+    pushed.add_done_callback(functools.partial(_record_push_result, item_id))
+
+
+def resume_pending_pushes() -> None:
+    """Queue pushes again for items a previous process left pending"""
+    db = SessionLocal()
+    try:
+        pending = db.query(DataItem.id, DataItem.hash).filter(
+            DataItem.dvc_status == DVC_PENDING).all()
+    finally:
+        db.close()
+    for item_id, file_hash in pending:
+        _track_push(item_id, _queue_push(HashInfo("md5", file_hash)))
+
+
+def wait_for_pending_pushes() -> None:
+    """Block until every push queued so far has finished"""
+    if _push_thread is None:
+        return
+    # The worker drains the queue in order, so an empty entry marks the tail
+    try:
+        _queue_push(None).result()
+    except Exception:
+        pass
+
+
+# Uploads are copied in 4 MiB chunks instead of copyfileobj's 64 KiB default
+# when the kernel copy path below is not available
+_COPY_BUFSIZE = 4 * 1024 * 1024
+
+
+class _GiveupOnFastCopy(Exception):
+    """Raised when the kernel cannot copy between the two descriptors"""
+
+
+def _spooled_parts(src) -> Tuple[Any, Optional[int]]:
+    """Return the object backing ``src`` and its OS-level fd, if it has one
+
+    SpooledTemporaryFile.fileno() would roll an in-memory upload over to
+    disk, so the wrapped file is inspected directly.
+    """
+    raw = getattr(src, '_file', src)
+    if isinstance(raw, io.BytesIO):
+        return raw, None
+    try:
+        return raw, raw.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return raw, None
+
+
+def _kernel_copy(src_fd: int, dst_fd: int, offset: int, count: int) -> None:
+    """Copy ``count`` bytes from ``src_fd`` at ``offset`` without leaving the kernel"""
+    copy_file_range = getattr(os, 'copy_file_range', None)
+    copied = 0
+    while copied < count:
+        try:
+            if copy_file_range is not None:
+                n = copy_file_range(src_fd, dst_fd, count - copied,
+                                    offset + copied)
+            else:
+                n = os.sendfile(dst_fd, src_fd, offset + copied,
+                                count - copied)
+        except OSError as e:
+            if copy_file_range is not None:
+                # e.g. EXDEV on older kernels; sendfile handles any pair
+                copy_file_range = None
+                continue
+            if copied == 0:
+                raise _GiveupOnFastCopy(e)
+            raise
+        if n == 0:
+            # Source ended early (e.g. truncated underneath us); a short
+            # destination must not pass for a complete copy
+            if copied == 0:
+                raise _GiveupOnFastCopy()
+            raise OSError(errno.EIO,
+                          f"Copied {copied} of {count} bytes before EOF")
+        copied += n
+
+
+def _partial_path(destination: Path) -> Path:
+    """Hidden sibling an upload is written to before being renamed into place"""
+    return destination.with_name(
+        f".{destination.name}.{os.urandom(4).hex()}.part")
+
+
+def _copy_to_path(src, destination: Path) -> Tuple[str, int]:
+    """Copy ``src`` to ``destination``; return the MD5 and size of what was written
+
+    The bytes go to a hidden sibling first and are renamed into place once
+    complete, so a failed or interrupted upload never leaves a truncated
+    file under the real name for ``dvc add`` to pick up.
+    """
+    partial = _partial_path(destination)
+    fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    try:
+        result = _copy_to_fd(src, fd)
+        os.replace(partial, destination)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(partial)
+        raise
+    return result
+
+
+def _copy_to_fd(src, fd: int) -> Tuple[str, int]:
+    """Copy ``src`` into ``fd`` and close it; return the MD5 and size written
+
+    Uploads still in memory are hashed and written straight from their
+    buffer; ones spooled to disk are hashed through an mmap and copied with
+    copy_file_range/sendfile, so their bytes are never read into Python.
+    """
+    md5 = hashlib.md5(usedforsecurity=False)
+    raw, src_fd = _spooled_parts(src)
+    start = src.tell()
+    with open(fd, "wb", closefd=True) as buffer:
+        if isinstance(raw, io.BytesIO):
+            with raw.getbuffer() as view, view[start:] as data:
+                md5.update(data)
+                return md5.hexdigest(), buffer.write(data)
+
+        if src_fd is not None and hasattr(os, 'sendfile'):
+            size = os.fstat(src_fd).st_size - start
+            try:
+                _kernel_copy(src_fd, fd, start, size)
+            except _GiveupOnFastCopy:
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                if size > 0:
+                    with mmap.mmap(src_fd, 0, access=mmap.ACCESS_READ) as mm:
+                        with memoryview(mm)[start:] as data:
+                            md5.update(data)
+                return md5.hexdigest(), max(size, 0)
+
+        size = 0
+        while chunk := src.read(_COPY_BUFSIZE):
+            md5.update(chunk)
+            size += buffer.write(chunk)
+    return md5.hexdigest(), size
+
+
+async def save_upload_file(upload_file: UploadFile,
+                           destination: Path) -> Tuple[str, int]:
+    try:
+        return await run_in_threadpool(_copy_to_path, upload_file.file,
+                                       destination)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                            detail=f"Could not save file: {str(e)}")
+
+
+def _write_hashed(fd: int, md5, data: bytearray) -> None:
+    md5.update(data)
+    with memoryview(data) as view:
+        while view:
+            view = view[os.write(fd, view):]
+
+
+async def save_upload_stream(chunks: AsyncIterator[bytes],
+                             destination: Path) -> Tuple[str, int]:
+    """Write a streamed request body to ``destination``; return its MD5 and size
+
+    Chunks are gathered into blocks of ``_COPY_BUFSIZE`` and each block is
+    hashed and written in the threadpool, so the body is never spooled and
+    at most one block is held in memory. Like ``_copy_to_path`` the file
+    only appears under its real name once complete.
+    """
+    md5 = hashlib.md5(usedforsecurity=False)
+    size = 0
+    partial = _partial_path(destination)
+    try:
+        fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            pending = bytearray()
+            async for chunk in chunks:
+                pending += chunk
+                if len(pending) >= _COPY_BUFSIZE:
+                    block, pending = pending, bytearray()
+                    await run_in_threadpool(_write_hashed, fd, md5, block)
+                    size += len(block)
+            if pending:
+                await run_in_threadpool(_write_hashed, fd, md5, pending)
+                size += len(pending)
+        finally:
+            os.close(fd)
+        os.replace(partial, destination)
+    except BaseException as e:
+        with contextlib.suppress(OSError):
+            os.unlink(partial)
+        if isinstance(e, Exception) and not isinstance(e, HTTPException):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Could not save file: {str(e)}")
+        raise
+    return md5.hexdigest(), size
+
+
+# Folder uploads split their files into at most this many contiguous batches,
+# one threadpool job each: small folders get a thread per file, while
+# thousands of small files still cost only a few dozen thread hand-offs
+_SAVE_WORKERS = 32
+
+
+def _copy_many(pairs: List[Tuple[UploadFile, Path]]) -> List[Tuple[str, int]]:
+    return [_copy_to_path(upload.file, path) for upload, path in pairs]
+
+
+async def save_upload_files(
+        pairs: List[Tuple[UploadFile, Path]]) -> List[Tuple[str, int]]:
+    """Save several uploads at once; results are in the order of ``pairs``"""
+    batch_size = -(-len(pairs) // _SAVE_WORKERS) or 1
+    batches = [
+        pairs[i:i + batch_size] for i in range(0, len(pairs), batch_size)
+    ]
+    try:
+        saved = await asyncio.gather(
+            *(run_in_threadpool(_copy_many, batch) for batch in batches))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                             detail=f"Could not save file: {str(e)}")
+    return [result for batch in saved for result in batch]
+
+
+class _HashingWriter:
+    """Write-only file wrapper that MD5s everything passing through it"""
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self.md5 = hashlib.md5(usedforsecurity=False)
+
+    def write(self, data) -> int:
+        self.md5.update(data)
+        return self._fileobj.write(data)
+
+
+def _pack_folder(folder_path: Path) -> Tuple[Path, str]:
+    """Replace ``folder_path`` with ``<folder_path>.tar``; return it and its MD5"""
+    tar_path = folder_path.with_name(folder_path.name + ".tar")
+    with tar_path.open("wb") as raw:
+        writer = _HashingWriter(raw)
+        # Stream mode ('w|') only ever calls write(), so the MD5 is exact
+        with tarfile.open(fileobj=writer, mode="w|",
+                          bufsize=_COPY_BUFSIZE) as tar:
+            tar.add(folder_path, arcname=folder_path.name)
+    shutil.rmtree(folder_path, ignore_errors=True)
+    return tar_path, writer.md5.hexdigest()
 
 
 def extract_common_folder_name(files: List[UploadFile]) -> str:
@@ -78,51 +521,26 @@ def extract_common_folder_name(files: List[UploadFile]) -> str:
     if not files:
         return 'unknown_folder'
     
-    # Get all normalized file paths
-    normalized_paths = []
+    # Directory part of every normalized path; commonpath compares whole
+    # components and skips empty ones, e.g. from doubled separators
+    dirs = []
     for file in files:
-        file_name = file.filename or 'unknown_file'
-        # Normalize path separators and split into components
-        normalized_path = file_name.replace('\\', '/')
-        path_parts = [part for part in normalized_path.split('/') if part]
-        normalized_paths.append(path_parts)
-    
-    # Find the common prefix among all paths
-    if not normalized_paths:
-        return 'unknown_folder'
-    
-    # Start with the first path and find common parts
-    common_parts = normalized_paths[0][:-1]  # Exclude the filename
-    
-    for path_parts in normalized_paths[1:]:
-        # Compare up to the second-to-last part (excluding filename)
-        current_parts = path_parts[:-1]
-        
-        # Find common prefix length
-        common_length = 0
-        max_length = min(len(common_parts), len(current_parts))
-        
-        for i in range(max_length):
-            if common_parts[i] == current_parts[i]:
-                common_length += 1
-            else:
-                break
-        
-        # Truncate common_parts to the common length
-        common_parts = common_parts[:common_length]
-        
-        # If no common parts left, break early
-        if not common_parts:
+        file_dir = (file.filename or 'unknown_file').replace(
+            '\\', '/').strip('/').rpartition('/')[0]
+        if not file_dir:
+            # A file at the top level leaves no common folder; flat uploads
+            # stop at the first file
             break
-    
-    # If we have common folder parts, join them with underscores
-    if common_parts:
-        return '_'.join(common_parts)
+        dirs.append(file_dir)
     else:
-        # No common folder path, fall back to first filename without extension
-        first_file_name = files[0].filename or 'unknown_file'
-        filename = first_file_name.split('/')[-1].split('\\')[-1]
-        return filename.rsplit('.', 1)[0] if '.' in filename else filename
+        # If we have common folder parts, join them with underscores
+        common_path = posixpath.commonpath(dirs)
+        if common_path:
+            return common_path.replace('/', '_')
+
+    # No common folder path, fall back to first filename without extension
+    first_file_name = files[0].filename or 'unknown_file'
+    return PurePosixPath(first_file_name.replace('\\', '/')).stem
 
 
 async def create_folder_data_item(files: List[UploadFile],
@@ -136,190 +554,251 @@ async def create_folder_data_item(files: List[UploadFile],
     # Extract the common folder path from all uploaded files
     folder_base_name = extract_common_folder_name(files)
     folder_name = folder_base_name.replace(' ', '_').lower()
-    folder_path = user_upload_dir / folder_name
+    folder_path = user_upload_dir / _relative_upload_path(folder_name)
     folder_path.mkdir(parents=True, exist_ok=True)
 
-    file_types = set()
+    file_types: Counter = Counter()
+    known_hashes: Dict[Path, str] = {}
 
-    # Save all files preserving their relative paths
+    # Save all files preserving their relative paths. A repeated name keeps
+    # the last file sent, as it would when written one after another.
+    destinations: Dict[Path, UploadFile] = {}
     for file in files:
         file_name = file.filename or 'unknown_file'
 
-        # Normalize path separators and create subdirectories
-        normalized_path = file_name.replace('\\', '/')
-        file_subdir = folder_path / normalized_path.rsplit(
-            '/', 1)[0] if '/' in normalized_path else folder_path
-        file_subdir.mkdir(parents=True, exist_ok=True)
-        file_path = folder_path / normalized_path
-
-        await save_upload_file(file, file_path)
+        # Normalize path separators; subdirectories are created below
+        relative_path = _relative_upload_path(file_name)
+        file_path = folder_path / relative_path
+        destinations.pop(file_path, None)
+        destinations[file_path] = file
+
+        if relative_path.suffix:
+            file_types[relative_path.suffix[1:].lower()] += 1
+
+    # One mkdir per distinct directory, parents before children
+    subdirs = {file_path.parent for file_path in destinations}
+    subdirs.discard(folder_path)
+    for subdir in sorted(subdirs, key=lambda d: len(d.parts)):
+        subdir.mkdir(parents=True, exist_ok=True)
+
+    saved = await save_upload_files([
+        (file, file_path) for file_path, file in destinations.items()
+    ])
+    for file_path, (md5, _) in zip(destinations, saved):
+        known_hashes[file_path] = md5
+
+    # Many small files cost DVC per-file hashing and push work; track them
+    # as one archive instead
+    dvc_target = folder_path
+    if PACK_FOLDER_THRESHOLD and len(files) > PACK_FOLDER_THRESHOLD:
+        dvc_target, tar_md5 = _pack_folder(folder_path)
+        known_hashes = {dvc_target: tar_md5}
 
-        if '.' in file_name:
-            file_types.add(file_name.split('.')[-1])
+    try:
+        # Size and file count come from what dvc add recorded
+        folder_hash, folder_size, nfiles, pushed = await run_in_threadpool(
+            dvc_add_and_push, dvc_target, known_hashes)
+    except DvcException as e:
+        # Clean up the folder if DVC fails; nothing was added to the session
+        if dvc_target is folder_path:
+            shutil.rmtree(folder_path, ignore_errors=True)
+        else:
+            dvc_target.unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"DVC operation failed: {e}")
 
-    # Create single data item for the folder (size and file_count will be updated after DVC add)
+    # Create single data item for the folder, inserted in one transaction
+    # once every field is known
     db_data_item = DataItem(
         name=folder_base_name,
         description=data.description,
         project=data.project,
         source=data.source,
-        file_path=str(folder_path),
-        file_size=0,  # Will be updated from DVC file
+        file_path=str(dvc_target),
+        file_size=folder_size or 0,
         file_type=', '.join(sorted(file_types)) if file_types else 'folder',
+        hash=folder_hash,
         is_folder=True,
-        file_count=0,  # Will be updated from DVC file
+        file_count=nfiles or len(files),
+        dvc_status=DVC_PENDING,
         user_id=user.id,
         parent_id=data.parent_id)
     db.add(db_data_item)
     db.commit()
     db.refresh(db_data_item)
+    _track_push(db_data_item.id, pushed)
+    return db_data_item
 
-    try:
-        # Run DVC commands from the uploads DVC project directory
-        relative_folder_path = os.path.relpath(str(folder_path),
-                                               DVC_UPLOADS_PROJECT)
-        run_dvc_command(["add", relative_folder_path],
-                        capture_output=True,
-                        cwd=DVC_UPLOADS_PROJECT)
-        run_dvc_command(["push"],
-                        capture_output=True,
-                        cwd=DVC_UPLOADS_PROJECT)
-
-        dvc_file_path = str(folder_path) + ".dvc"
-        if os.path.exists(dvc_file_path):
-            # Read DVC file to get size and file count
-            with open(dvc_file_path, 'r') as f:
-                dvc_content = yaml.safe_load(f)
-
-            if dvc_content and 'outs' in dvc_content and len(
-                    dvc_content['outs']) > 0:
-                dvc_out = dvc_content['outs'][0]
-                db_data_item.file_size = dvc_out.get('size', 0)
-                db_data_item.file_count = dvc_out.get('nfiles', len(files))
-                db_data_item.hash = dvc_out.get('md5', '')
-
-            db.commit()
-            db.refresh(db_data_item)
-
-    except subprocess.CalledProcessError as e:
-        # Clean up the folder if DVC fails
-        import shutil
-        shutil.rmtree(folder_path, ignore_errors=True)
-        db.delete(db_data_item)
-        db.commit()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=
-            f"DVC operation failed: {e.stderr.decode() if e.stderr else str(e)}"
-        )
 
-    return db_data_item
+def _relative_upload_path(file_name: Optional[str]) -> PurePosixPath:
+    """Normalise a client-supplied file name to a path below an upload dir
 
+    Absolute paths and ``..`` components are rejected, so a name can never
+    point outside the directory it is joined onto.
+    """
+    relative_path = PurePosixPath((file_name or 'unknown_file').replace('\\', '/'))
+    if (relative_path.is_absolute() or '..' in relative_path.parts
+            or not relative_path.name):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Invalid file name: {file_name}")
+    return relative_path
 
-async def create_data_item(file: UploadFile, data: DataItemCreate, user: User,
-                           db: Session) -> DataItemResponse:
-    ensure_dvc_repo()
 
+def _upload_destination(user: User,
+                        file_name: Optional[str]) -> Tuple[PurePosixPath, Path]:
+    """Map an uploaded file name to its path under the user's upload dir"""
     user_upload_dir = Path(UPLOAD_DIR or '/tmp/rdm/uploads') / str(user.id)
     user_upload_dir.mkdir(parents=True, exist_ok=True)
 
-    # Handle folder structure by preserving relative paths
-    file_name = file.filename or 'unknown_file'
-
     # If the filename contains path separators (from folder upload), preserve the structure
-    if '/' in file_name or '\\' in file_name:
-        # Normalize path separators and create subdirectories
-        normalized_path = file_name.replace('\\', '/')
-        file_subdir = user_upload_dir / normalized_path.rsplit(
-            '/', 1)[0] if '/' in normalized_path else user_upload_dir
-        file_subdir.mkdir(parents=True, exist_ok=True)
-        file_path = user_upload_dir / normalized_path
-    else:
-        file_path = user_upload_dir / file_name
-
-    await save_upload_file(file, file_path)
-
-    file_size = file_path.stat().st_size
-    file_type = file_name.split('.')[-1] if '.' in file_name else None
-
-    # Use the actual filename as the display name
-    display_name = file_name.split('/')[-1].split('\\')[
-        -1]  # Get just the filename without path
+    relative_path = _relative_upload_path(file_name)
+    file_path = user_upload_dir / relative_path
+    # Symlinks already under the user's dir must not lead out of it either
+    if not file_path.resolve().is_relative_to(user_upload_dir.resolve()):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Invalid file name: {file_name}")
+    if len(relative_path.parts) > 1:
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+    return relative_path, file_path
+
+
+async def _record_data_item(relative_path: PurePosixPath, file_path: Path,
+                            file_md5: str, file_size: int,
+                            data: DataItemCreate, user: User,
+                            db: Session) -> DataItem:
+    """Track a saved upload with DVC, then store its DataItem"""
+    try:
+        # Hash and size were taken while copying; dvc add records the same
+        *_, pushed = await run_in_threadpool(dvc_add_and_push, file_path,
+                                             {file_path: file_md5})
+    except DvcException as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"DVC operation failed: {e}")
 
-    db_data_item = DataItem(name=display_name,
+    # Single transaction once every field is known
+    db_data_item = DataItem(name=relative_path.name,
                             description=data.description,
                             project=data.project,
                             source=data.source,
                             file_path=str(file_path),
                             file_size=file_size,
-                            file_type=file_type,
+                            file_type=relative_path.suffix[1:] or None,
+                            hash=file_md5,
+                            dvc_status=DVC_PENDING,
                             user_id=user.id,
                             parent_id=data.parent_id)
     db.add(db_data_item)
     db.commit()
     db.refresh(db_data_item)
+    _track_push(db_data_item.id, pushed)
+    return db_data_item
 
-    try:
-        # Run DVC commands from the uploads DVC project directory
-        relative_file_path = os.path.relpath(str(file_path),
-                                             DVC_UPLOADS_PROJECT)
-        run_dvc_command(["add", relative_file_path],
-                        capture_output=True,
-                        cwd=DVC_UPLOADS_PROJECT)
-        run_dvc_command(["push"],
-                        capture_output=True,
-                        cwd=DVC_UPLOADS_PROJECT)
-
-        dvc_file_path = str(file_path) + ".dvc"
-        if os.path.exists(dvc_file_path):
-            with open(dvc_file_path, 'r') as f:
-                dvc_content = yaml.safe_load(f)
-
-            if dvc_content and 'outs' in dvc_content and len(
-                    dvc_content['outs']) > 0:
-                dvc_out = dvc_content['outs'][0]
-                db_data_item.hash = dvc_out.get('md5', '')
-                db_data_item.file_size = dvc_out.get(
-                    'size',
-                    db_data_item.file_size)  # Update file_size from DVC file
-
-            db.commit()
-            db.refresh(db_data_item)
-
-    except subprocess.CalledProcessError as e:
-        db.delete(db_data_item)
-        db.commit()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=
-            f"DVC operation failed: {e.stderr.decode() if e.stderr else str(e)}"
-        )
 
-    return db_data_item
+async def create_data_item(file: UploadFile, data: DataItemCreate, user: User,
+                           db: Session) -> DataItemResponse:
+    ensure_dvc_repo()
+    relative_path, file_path = _upload_destination(user, file.filename)
+    file_md5, file_size = await save_upload_file(file, file_path)
+    return await _record_data_item(relative_path, file_path, file_md5,
+                                   file_size, data, user, db)
+
+
+async def create_data_item_from_stream(chunks: AsyncIterator[bytes],
+                                       file_name: str, data: DataItemCreate,
+                                       user: User, db: Session) -> DataItem:
+    """Like ``create_data_item``, for a file streamed as a raw request body"""
+    ensure_dvc_repo()
+    relative_path, file_path = _upload_destination(user, file_name)
+    file_md5, file_size = await save_upload_stream(chunks, file_path)
+    return await _record_data_item(relative_path, file_path, file_md5,
+                                   file_size, data, user, db)
+
+
+# Columns DataItemResponse serialises; updated_at is never read on these paths
+_response_columns = load_only(DataItem.id, DataItem.name, DataItem.description,
+                              DataItem.project, DataItem.source,
+                              DataItem.parent_id, DataItem.file_path,
+                              DataItem.hash, DataItem.file_size,
+                              DataItem.file_type, DataItem.is_folder,
+                              DataItem.file_count, DataItem.dvc_status,
+                              DataItem.user_id, DataItem.created_at)
+# Owners for a mixed listing in one IN query, without their password hashes
+_response_owner = selectinload(DataItem.user).load_only(
+    User.id, User.email, User.avatar_url, User.is_admin, User.created_at)
+# The parent rides along in the item's SELECT and all children come from one
+# IN query; owners are usually the requester, already in the identity map
+_lineage_options = (
+    _response_columns,
+    joinedload(DataItem.parent).options(_response_columns),
+    selectinload(DataItem.children).options(_response_columns),
+)
 
 
 def get_data_item_with_lineage(db: Session, item_id: int,
                                user: User) -> Optional[DataItem]:
-    return db.query(DataItem).filter(DataItem.id == item_id).first()
+    return db.query(DataItem).options(*_lineage_options).filter(
+        DataItem.id == item_id).one_or_none()
+
+
+def delete_data_item_row(db: Session,
+                         item_id: int,
+                         owner_id: Optional[int] = None) -> Optional[str]:
+    """Delete a data item without loading it; return its name
+
+    Children are detached first, as the ORM cascade used to do, then the
+    row goes in one DELETE ... RETURNING. With ``owner_id`` only that
+    user's item matches. Returns None, with nothing changed, if no row
+    matched.
+    """
+    db.execute(
+        update(DataItem).where(DataItem.parent_id == item_id).values(
+            parent_id=None).execution_options(synchronize_session=False))
+    stmt = delete(DataItem).where(DataItem.id == item_id)
+    if owner_id is not None:
+        stmt = stmt.where(DataItem.user_id == owner_id)
+    item_name = db.scalar(
+        stmt.returning(DataItem.name).execution_options(
+            synchronize_session=False))
+    if item_name is None:
+        db.rollback()
+        return None
+    db.commit()
+    return item_name
 
 
 @timing_logger
 def get_user_data_items(db: Session,
                         user: User,
                         skip: int = 0,
-                        limit: int = 100):
-    log_timing(f"get_user_data_items - starting query for user {user.id}")
-    start_time = log_timing("get_user_data_items - executing query")
-    result = db.query(DataItem).filter(
-        DataItem.user_id == user.id).offset(skip).limit(limit).all()
-    log_timing(f"get_user_data_items - query completed, returned {len(result)} items", start_time)
-    return result
+                        limit: int = 100,
+                        after_id: Optional[int] = None):
+    """List a user's items in id order.
+
+    With ``after_id`` the page starts after that id (keyset pagination),
+    which avoids scanning and discarding ``skip`` rows.
+    """
+    # item.user resolves from the identity map: it is the requesting user
+    query = db.query(DataItem).options(_response_columns).filter(
+        DataItem.user_id == user.id)
+    with TimingBlock("get_user_data_items - query"):
+        return _paginate(query, skip, limit, after_id).all()
 
 
 @timing_logger
-def get_all_data_items(db: Session, skip: int = 0, limit: int = 100):
-    log_timing("get_all_data_items - starting query")
-    start_time = log_timing("get_all_data_items - executing query")
-    result = db.query(DataItem).offset(skip).limit(limit).all()
-    log_timing(f"get_all_data_items - query completed, returned {len(result)} items", start_time)
-    return result
+def get_all_data_items(db: Session,
+                       skip: int = 0,
+                       limit: int = 100,
+                       after_id: Optional[int] = None):
+    # The page's owners come from one IN query
+    query = db.query(DataItem).options(_response_columns, _response_owner)
+    with TimingBlock("get_all_data_items - query"):
+        return _paginate(query, skip, limit, after_id).all()
+
+
+def _paginate(query, skip: int, limit: int, after_id: Optional[int]):
+    if after_id is not None:
+        return query.filter(DataItem.id > after_id).order_by(
+            DataItem.id).limit(limit)
+    return query.order_by(DataItem.id).offset(skip).limit(limit)
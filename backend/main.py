@@ -3,16 +3,31 @@ from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from .database import create_tables, get_db
+from typing import Optional
+from .database import create_tables, User
 from .routers import auth, data, admin
 from .routers.log import router as log_router
 from .routers.dvc_remote import router as dvc_remote_router
 from .auth import get_current_user_for_template
 from .config import config
+from jinja2 import FileSystemBytecodeCache
+from starlette.formparsers import MultiPartParser
 import re
 
-app = FastAPI(title="RINT Data Manager", version="0.1.0")
+try:
+    import orjson  # noqa: F401
+except ImportError:
+    from fastapi.responses import JSONResponse as DefaultResponse
+else:
+    # Route return values are still validated by their response models;
+    # only the final dict-to-bytes step moves off the stdlib encoder
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+
+app = FastAPI(title="RINT Data Manager",
+              version="0.1.0",
+              default_response_class=DefaultResponse)
+
+MultiPartParser.spool_max_size = int(config.dvc_config['upload_spool_size'])
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,6 +39,12 @@ app.add_middleware(
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
+# Compiled templates are shared across workers and restarts; without reload
+# the loader also skips its per-render mtime check
+templates.env.bytecode_cache = FileSystemBytecodeCache()
+templates.env.auto_reload = bool(config.server.get('reload'))
+PAGE_TEMPLATES = ('dashboard.html', 'login.html', 'register.html',
+                  'register-admin.html', 'admin.html', 'usage.html')
 
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(data.router, prefix="/api/data", tags=["data"])
@@ -88,11 +109,24 @@ def startup_event():
     
     create_tables()
 
+    from .dvc_service import resume_pending_pushes, warm_up_dvc
+    warm_up_dvc()
+    resume_pending_pushes()
+
+    for name in PAGE_TEMPLATES:
+        templates.get_template(name)
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    from .dvc_service import wait_for_pending_pushes
+    wait_for_pending_pushes()
+
 
 @app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request, db: Session = Depends(get_db)):
-    current_user = get_current_user_for_template(request, db)
-    print(f"Current user in root: {current_user}")
+async def read_root(request: Request,
+                    current_user: Optional[User] = Depends(
+                        get_current_user_for_template)):
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
         "current_user": current_user
@@ -100,8 +134,9 @@ async def read_root(request: Request, db: Session = Depends(get_db)):
 
 
 @app.get("/login", response_class=HTMLResponse)
-async def login_page(request: Request, db: Session = Depends(get_db)):
-    current_user = get_current_user_for_template(request, db)
+async def login_page(request: Request,
+                     current_user: Optional[User] = Depends(
+                         get_current_user_for_template)):
     return templates.TemplateResponse("login.html", {
         "request": request,
         "current_user": current_user
@@ -109,8 +144,9 @@ async def login_page(request: Request, db: Session = Depends(get_db)):
 
 
 @app.get("/register", response_class=HTMLResponse)
-async def register_page(request: Request, db: Session = Depends(get_db)):
-    current_user = get_current_user_for_template(request, db)
+async def register_page(request: Request,
+                        current_user: Optional[User] = Depends(
+                            get_current_user_for_template)):
     return templates.TemplateResponse("register.html", {
         "request": request,
         "current_user": current_user
@@ -118,8 +154,9 @@ async def register_page(request: Request, db: Session = Depends(get_db)):
 
 
 @app.get("/register-admin", response_class=HTMLResponse)
-async def register_admin_page(request: Request, db: Session = Depends(get_db)):
-    current_user = get_current_user_for_template(request, db)
+async def register_admin_page(request: Request,
+                              current_user: Optional[User] = Depends(
+                                  get_current_user_for_template)):
     return templates.TemplateResponse("register-admin.html", {
         "request": request,
         "current_user": current_user
@@ -127,9 +164,9 @@ async def register_admin_page(request: Request, db: Session = Depends(get_db)):
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
-async def dashboard_page(request: Request, db: Session = Depends(get_db)):
-    current_user = get_current_user_for_template(request, db)
-    print(f"Current user in dashboard: {current_user}")
+async def dashboard_page(request: Request,
+                         current_user: Optional[User] = Depends(
+                             get_current_user_for_template)):
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
         "current_user": current_user
@@ -137,8 +174,9 @@ async def dashboard_page(request: Request, db: Session = Depends(get_db)):
 
 
 @app.get("/admin", response_class=HTMLResponse)
-async def admin_page(request: Request, db: Session = Depends(get_db)):
-    current_user = get_current_user_for_template(request, db)
+async def admin_page(request: Request,
+                     current_user: Optional[User] = Depends(
+                         get_current_user_for_template)):
     return templates.TemplateResponse("admin.html", {
         "request": request,
         "current_user": current_user
@@ -146,8 +184,9 @@ async def admin_page(request: Request, db: Session = Depends(get_db)):
 
 
 @app.get("/usage", response_class=HTMLResponse)
-async def usage_page(request: Request, db: Session = Depends(get_db)):
-    current_user = get_current_user_for_template(request, db)
+async def usage_page(request: Request,
+                     current_user: Optional[User] = Depends(
+                         get_current_user_for_template)):
     # Extract public server URL from allowed_origins
     allowed_origins = config.cors.get('allowed_origins', [])
     server_url = "http://localhost:7123"  # Default fallback
@@ -1,51 +1,54 @@
+import json
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import Response
+from sqlalchemy import delete, exists, select
 from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db, User, ensure_tables_exist, DataItem
-from ..schemas import UserResponse, UserPasswordUpdate, DeleteResponse, GCResponse
+from typing import AbstractSet, Dict, Iterable, List, Set, Tuple
+from ..database import get_db, User, DataItem
+from ..schemas import UserResponse, UserPasswordUpdate, DeleteResponse, GCResponse, UserListAdapter, dump_list_json
 from ..auth import get_current_admin_user, get_password_hash
+from ..dvc_auth import invalidate_dvc_auth_cache
+from ..dvc_service import DVC_FILES_DIR, delete_data_item_row
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def get_target_user(user_id: int, db: Session = Depends(get_db)) -> User:
+    """Load the user named in the path, or 404"""
+    user = db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="User not found")
+    return user
+
+
 @router.get("/users", response_model=List[UserResponse])
 def list_users(skip: int = 0,
                limit: int = 100,
                db: Session = Depends(get_db),
                current_admin: User = Depends(get_current_admin_user)):
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
     users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    return Response(dump_list_json(UserListAdapter, users),
+                    media_type="application/json")
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
-def get_user(user_id: int,
-             db: Session = Depends(get_db),
-             current_admin: User = Depends(get_current_admin_user)):
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail="User not found")
+def get_user(current_admin: User = Depends(get_current_admin_user),
+             user: User = Depends(get_target_user)):
     return user
 
 
 @router.put("/users/{user_id}/admin", response_model=UserResponse)
-def toggle_admin_status(user_id: int,
-                        db: Session = Depends(get_db),
-                        current_admin: User = Depends(get_current_admin_user)):
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail="User not found")
-
+def toggle_admin_status(db: Session = Depends(get_db),
+                        current_admin: User = Depends(get_current_admin_user),
+                        user: User = Depends(get_target_user)):
     # Prevent admin from removing their own admin status
     if user.id == current_admin.id:  # type: ignore[comparison-overlap]
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
@@ -61,37 +64,35 @@ def toggle_admin_status(user_id: int,
 def delete_user(user_id: int,
                 db: Session = Depends(get_db),
                 current_admin: User = Depends(get_current_admin_user)):
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail="User not found")
-
     # Prevent admin from deleting themselves
-    if user.id == current_admin.id:  # type: ignore[comparison-overlap]
+    if user_id == current_admin.id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Cannot delete your own account")
 
-    db.delete(user)
+    # One DELETE; users who still own data items are left alone, since
+    # data_items.user_id cannot be nulled out
+    deleted = db.scalar(
+        delete(User).where(
+            User.id == user_id,
+            ~exists().where(DataItem.user_id == User.id)).returning(
+                User.id).execution_options(synchronize_session=False))
+    if deleted is None:
+        db.rollback()
+        if db.get(User, user_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail="User not found")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="User still owns data items")
     db.commit()
+    invalidate_dvc_auth_cache()
     return {"message": "User deleted successfully"}
 
 
 @router.put("/users/{user_id}/password")
-def reset_user_password(user_id: int,
-                        password_data: UserPasswordUpdate,
+def reset_user_password(password_data: UserPasswordUpdate,
                         db: Session = Depends(get_db),
-                        current_admin: User = Depends(get_current_admin_user)):
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail="User not found")
-
+                        current_admin: User = Depends(get_current_admin_user),
+                        user: User = Depends(get_target_user)):
     # Prevent admin from resetting their own password through this endpoint
     if user.id == current_admin.id:  # type: ignore[comparison-overlap]
         raise HTTPException(
@@ -107,6 +108,7 @@ def reset_user_password(user_id: int,
     user.hashed_password = get_password_hash(
         password_data.new_password)  # type: ignore
     db.commit()
+    invalidate_dvc_auth_cache()
     db.refresh(user)
     return {"message": "Password reset successfully"}
 
@@ -116,21 +118,11 @@ def admin_delete_data_item(item_id: int,
                           db: Session = Depends(get_db),
                           current_admin: User = Depends(get_current_admin_user)):
     """Admin endpoint to delete any data item"""
-    ensure_tables_exist()
-
-    # Get the data item
-    data_item = db.query(DataItem).filter(DataItem.id == item_id).first()
-    if not data_item:
+    item_name = delete_data_item_row(db, item_id)
+    if item_name is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Data item not found")
 
-    # Store item info for response
-    item_name = str(data_item.name)
-
-    # Delete the data item (this will cascade delete related records)
-    db.delete(data_item)
-    db.commit()
-
     return DeleteResponse(
         message=f"Data item '{item_name}' deleted successfully by admin",
         item_id=item_id,
@@ -138,20 +130,120 @@ def admin_delete_data_item(item_id: int,
     )
 
 
+# Shards swept concurrently by the GC; unlink and stat release the GIL, so
+# the threads overlap one shard's directory reads with another's deletes
+_GC_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def _sweep_shard(top_fd: int, shard: str, files_dir: str,
+                 tails: AbstractSet[str]) -> Tuple[int, int]:
+    """Delete one shard's unreferenced objects, then the shard if emptied
+
+    ``tails`` holds the referenced hashes of this shard minus its prefix,
+    so each file name is looked up as-is.
+    """
+    files_deleted = 0
+    space_freed = 0
+    shard_fd = os.open(shard, os.O_RDONLY | os.O_DIRECTORY, dir_fd=top_fd)
+    try:
+        with os.scandir(shard_fd) as it:
+            entries = list(it)
+        remaining = len(entries)
+        for entry in entries:
+            name = entry.name
+            # Skip .dir files for now, handle them separately if needed
+            if (name.endswith('.dir')
+                    or not entry.is_file(follow_symlinks=False)
+                    or name in tails):
+                continue
+            try:
+                # Get file size before deletion
+                file_size = entry.stat(follow_symlinks=False).st_size
+                os.unlink(name, dir_fd=shard_fd)
+            except OSError as e:
+                # Log error but continue with other files
+                logger.error("Error deleting file %s: %s",
+                             os.path.join(files_dir, shard, name), e)
+                continue
+            files_deleted += 1
+            space_freed += file_size
+            remaining -= 1
+    finally:
+        os.close(shard_fd)
+    if not remaining:
+        try:
+            os.rmdir(shard, dir_fd=top_fd)
+        except OSError:
+            pass  # Directory not empty or other error
+    return files_deleted, space_freed
+
+
+def _scan_md5_shards(files_dir: str,
+                     referenced: Dict[str, AbstractSet[str]]) -> Tuple[int, int]:
+    """Delete cache objects whose hash is not in ``referenced``
+
+    ``referenced`` maps each 2-character shard prefix to the set of hash
+    tails kept under it.
+
+    DVC stores objects as ``<first 2 hash chars>/<rest>``. Each shard is
+    listed once with scandir, which reads entries in getdents64 batches
+    and takes file types from d_type instead of a stat per entry. Sizes
+    and unlinks go through the shard's fd, and a shard left empty is
+    removed in the same pass. Up to ``_GC_WORKERS`` shards are swept at
+    once.
+
+    Returns the number of files deleted and the bytes freed.
+    """
+    top_fd = os.open(files_dir, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        with os.scandir(top_fd) as it:
+            shards = [entry.name for entry in it
+                      if entry.is_dir(follow_symlinks=False)]
+        with ThreadPoolExecutor(max_workers=_GC_WORKERS) as pool:
+            results = list(
+                pool.map(_sweep_shard, repeat(top_fd), shards,
+                         repeat(files_dir),
+                         (referenced.get(shard, frozenset())
+                          for shard in shards)))
+    finally:
+        os.close(top_fd)
+    return sum(r[0] for r in results), sum(r[1] for r in results)
+
+
+def _referenced_hashes(files_dir: str,
+                       hashes: Iterable[str]) -> Dict[str, Set[str]]:
+    """Bucket the hashes kept by the database by shard prefix
+
+    A folder is stored under its ``.dir`` hash, whose manifest in the
+    cache lists the md5 of every file in it; those files are kept too.
+    A manifest that is missing or unreadable is logged and its files are
+    left unreferenced.
+    """
+    referenced = defaultdict(set)
+    for file_hash in hashes:
+        if not file_hash.endswith('.dir'):
+            referenced[file_hash[:2]].add(file_hash[2:])
+            continue
+        manifest = os.path.join(files_dir, file_hash[:2], file_hash[2:])
+        try:
+            with open(manifest, 'rb') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error("Error reading manifest %s: %s", manifest, e)
+            continue
+        for entry in entries:
+            member = entry.get('md5')
+            if member:
+                referenced[member[:2]].add(member[2:])
+    return referenced
+
+
 @router.post("/gc", response_model=GCResponse)
 def garbage_collect(db: Session = Depends(get_db),
                    current_admin: User = Depends(get_current_admin_user)):
     """Garbage collection - remove DVC storage files not referenced in database"""
-    ensure_tables_exist()
-
-    import os
-    from pathlib import Path
-    from ..config import config
+    files_dir = DVC_FILES_DIR
 
-    # Get DVC storage path
-    storage_path = config.get_dvc_storage_path()
-    files_dir = os.path.join(storage_path, "files", "md5")
-    
     if not os.path.exists(files_dir):
         return GCResponse(
             message="DVC storage directory not found",
@@ -159,51 +251,14 @@ def garbage_collect(db: Session = Depends(get_db),
             space_freed=0
         )
 
-    # Get all file hashes from database
-    db_hashes = set()
-    data_items = db.query(DataItem).filter(DataItem.hash.isnot(None)).all()
-    for item in data_items:
-        if item.hash:
-            db_hashes.add(str(item.hash))
+    # Get all file hashes from database, as plain strings rather than ORM
+    # rows, bucketed by shard prefix to match DVC's on-disk layout
+    hash_stmt = select(DataItem.hash).where(DataItem.hash.isnot(None),
+                                            DataItem.hash != '')
+    referenced = _referenced_hashes(
+        files_dir, db.scalars(hash_stmt.execution_options(yield_per=10000)))
 
-    files_deleted = 0
-    space_freed = 0
-
-    # Walk through DVC storage directory
-    for root, dirs, files in os.walk(files_dir):
-        for file in files:
-            file_path = os.path.join(root, file)
-            
-            # Skip .dir files for now, handle them separately if needed
-            if file.endswith('.dir'):
-                continue
-                
-            # Try to match file with database hash
-            # DVC stores files as: files/md5/ab/abcdef...
-            relative_path = os.path.relpath(file_path, files_dir)
-            # Remove directory separators to reconstruct hash
-            file_hash = relative_path.replace(os.sep, '')
-            
-            if file_hash not in db_hashes:
-                try:
-                    # Get file size before deletion
-                    file_size = os.path.getsize(file_path)
-                    os.remove(file_path)
-                    files_deleted += 1
-                    space_freed += file_size
-                except OSError as e:
-                    # Log error but continue with other files
-                    print(f"Error deleting file {file_path}: {e}")
-
-    # Clean up empty directories
-    for root, dirs, files in os.walk(files_dir, topdown=False):
-        for dir in dirs:
-            dir_path = os.path.join(root, dir)
-            try:
-                if not os.listdir(dir_path):  # Directory is empty
-                    os.rmdir(dir_path)
-            except OSError:
-                pass  # Directory not empty or other error
+    files_deleted, space_freed = _scan_md5_shards(files_dir, referenced)
 
     return GCResponse(
         message=f"Garbage collection completed. Deleted {files_deleted} orphaned files.",
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from datetime import timedelta
+from typing import Optional
 import re
 import time
 import logging
-from ..database import get_db, User, ensure_tables_exist
+from ..database import get_db, User
 from ..schemas import UserCreate, UserLogin, Token, UserResponse
-from ..auth import authenticate_user, create_access_token, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_active_user, get_current_user_for_template
+from ..auth import authenticate_user, create_access_token, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES, get_current_active_user, get_current_user_for_template, invalidate_cached_token
 from ..config import config
 try:
     from ..utils.timing import timing_logger, log_timing
@@ -15,7 +17,7 @@ except ImportError:
     def timing_logger(func):
         return func
     def log_timing(message, start_time=None):
-        return time.time()
+        return time.perf_counter()
 
 # Set up logging for timing
 logger = logging.getLogger(__name__)
@@ -23,76 +25,77 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def validate_email_domain(email: str) -> bool:
+def _compile_email_regex() -> Optional[re.Pattern]:
     email_suffix_regex = config.auth.get('email_suffix_regex')
     if not email_suffix_regex:
-        return True  # Allow all emails if no regex is configured
+        return None  # Allow all emails if no regex is configured
 
     try:
-        return bool(re.match(email_suffix_regex, email))
+        return re.compile(email_suffix_regex)
     except re.error:
-        return True  # If regex is invalid, allow all emails (fail-safe)
+        logger.warning("Invalid auth.email_suffix_regex %r; allowing all emails",
+                       email_suffix_regex)
+        return None  # If regex is invalid, allow all emails (fail-safe)
+
+
+_email_regex = _compile_email_regex()
+
+
+def validate_email_domain(email: str) -> bool:
+    return _email_regex is None or _email_regex.match(email) is not None
+
+
+def _insert_user(db: Session, db_user: User) -> User:
+    """Insert a new user, letting the unique email index reject duplicates
+
+    One INSERT replaces a SELECT-then-INSERT, and two concurrent sign-ups
+    for the same address can no longer both get past the check.
+    """
+    db.add(db_user)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
+    db.refresh(db_user)
+    return db_user
 
 
 @router.post("/register", response_model=UserResponse)
 def register(user: UserCreate, db: Session = Depends(get_db)):
     from ..database import User
 
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
     # Validate email domain
     if not validate_email_domain(user.email):
         raise HTTPException(status_code=400,
                             detail="Email domain not allowed for registration")
 
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-
     hashed_password = get_password_hash(user.password)
     db_user = User(email=user.email, hashed_password=hashed_password)
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return _insert_user(db, db_user)
 
 
 @router.post("/register-admin", response_model=UserResponse)
 def register_admin(user: UserCreate, db: Session = Depends(get_db)):
     from ..database import User
 
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
     # Check if any admin users already exist
-    existing_admin = db.query(User).filter(User.is_admin == True).first()
-    if existing_admin:
+    if db.query(User.id).filter(User.is_admin == True).first():
         raise HTTPException(status_code=400,
                             detail="Admin user already exists")
 
     # Skip email domain validation for admin registration
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Email already registered")
-
     hashed_password = get_password_hash(user.password)
     db_user = User(email=user.email,
                    hashed_password=hashed_password,
                    is_admin=True)
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return _insert_user(db, db_user)
 
 
 @router.post("/login", response_model=Token)
 def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     from ..database import User
 
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
     user = authenticate_user(db, user_credentials.email,
                              user_credentials.password)
     if not user:
@@ -108,6 +111,22 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.post("/logout")
+def logout(request: Request):
+    """Drop the caller's token from the server's decode cache
+
+    This does not revoke the token: a JWT stays valid until it expires, so
+    logging out relies on the client discarding its copy.
+    """
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        invalidate_cached_token(auth_header[7:])
+    token = request.cookies.get("access_token")
+    if token:
+        invalidate_cached_token(token)
+    return {"message": "Logged out"}
+
+
 @router.get("/me", response_model=UserResponse)
 @timing_logger
 def get_current_user_info(
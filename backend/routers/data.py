@@ -1,20 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request
+from sqlalchemy import insert, or_, update
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ..database import get_db, ensure_tables_exist, UploadedMetadata, DataItem
-from ..schemas import DataItemCreate, DataItemResponse, DataItemWithLineage, UploadResponse, UploadedMetadataResponse, MetadataUploadResponse, DeleteResponse
+from ..database import get_db, get_write_generation, release_connection, UploadedMetadata, DataItem, DVC_PENDING, DVC_FAILED
+from ..schemas import DataItemCreate, DataItemResponse, DataItemWithLineage, UploadResponse, UploadedMetadataResponse, MetadataUploadResponse, DeleteResponse, DataItemListAdapter, dump_list_json
 from ..auth import get_current_active_user
 from ..database import User
-from ..dvc_service import create_data_item, create_folder_data_item, get_data_item_with_lineage, get_user_data_items, get_all_data_items
+from ..utils.cache import TTLCache
+from ..dvc_service import DVC_FILES_DIR, create_data_item, create_data_item_from_stream, create_folder_data_item, get_data_item_with_lineage, get_user_data_items, get_all_data_items, delete_data_item_row
 import yaml
+import functools
+import hashlib
 import os
 import json
 import zipfile
 import tempfile
+import shutil
 import time
 import logging
-from pathlib import Path
+from types import MappingProxyType
+from urllib.parse import quote
 from fastapi.responses import FileResponse, Response
+from starlette.background import BackgroundTask
 try:
     from ..utils.timing import timing_logger, log_timing
 except ImportError:
@@ -22,11 +29,35 @@ except ImportError:
     def timing_logger(func):
         return func
     def log_timing(message, start_time=None):
-        return time.time()
+        return time.perf_counter()
 
 # Set up logging for timing
 logger = logging.getLogger(__name__)
 
+
+# libyaml-backed loader/dumper when PyYAML was built with it
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+# Download media types by lower-cased file extension
+MEDIA_TYPES = MappingProxyType({
+    '.csv': 'text/csv',
+    '.json': 'application/json',
+    '.txt': 'text/plain',
+    '.xlsx':
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.parquet': 'application/octet-stream',
+    '.h5': 'application/octet-stream',
+    '.pkl': 'application/octet-stream',
+    '.py': 'text/plain',
+    '.ipynb': 'application/json',
+    '.zip': 'application/zip',
+    '.tar': 'application/x-tar',
+})
+
+# Names the DVC remote gives items before their .dvc metadata arrives
+HASH_NAME_PREFIXES = ('dvc_file_', 'dvc_dir_')
+
 router = APIRouter()
 
 
@@ -38,18 +69,20 @@ async def upload_data(files: List[UploadFile] = File(...),
                       parent_id: Optional[int] = Form(None),
                       db: Session = Depends(get_db),
                       current_user: User = Depends(get_current_active_user)):
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
+    # The multipart form was parsed before this handler ran; what remains is
+    # copying the spooled files to disk and dvc add, which need no connection
+    release_connection(db)
     data_item_data = DataItemCreate(source=source,
                                     description=description,
                                     project=project,
                                     parent_id=parent_id)
 
-    # Check if this is a folder upload (multiple files with path separators)
-    is_folder_upload = len(files) > 1 or any(
-        '/' in (file.filename or '') or '\\' in (file.filename or '')
-        for file in files)
+    # Check if this is a folder upload: several files, or a single file sent
+    # with a relative path. Only that lone filename needs looking at
+    is_folder_upload = len(files) > 1
+    if not is_folder_upload and files:
+        name = files[0].filename or ''
+        is_folder_upload = '/' in name or '\\' in name
 
     if is_folder_upload:
         data_item = await create_folder_data_item(files, data_item_data,
@@ -64,50 +97,100 @@ async def upload_data(files: List[UploadFile] = File(...),
     return UploadResponse(message=message, data_item=data_item)
 
 
+@router.post("/upload-stream", response_model=UploadResponse)
+async def upload_data_stream(request: Request,
+                             filename: str,
+                             source: str,
+                             description: Optional[str] = None,
+                             project: Optional[str] = None,
+                             parent_id: Optional[int] = None,
+                             db: Session = Depends(get_db),
+                             current_user: User = Depends(get_current_active_user)):
+    """Upload one file sent as the raw request body
+
+    Fields that /upload takes as form parts are query parameters here. The
+    body is written to disk as it arrives instead of being spooled by the
+    multipart parser first, which suits very large single files.
+    """
+    # The body is read below, after authentication; nothing touches the
+    # database again until it is saved and added to DVC
+    release_connection(db)
+    data_item_data = DataItemCreate(source=source,
+                                    description=description,
+                                    project=project,
+                                    parent_id=parent_id)
+    data_item = await create_data_item_from_stream(request.stream(), filename,
+                                                   data_item_data,
+                                                   current_user, db)
+    return UploadResponse(message="File uploaded successfully",
+                          data_item=data_item)
+
+
+# Serialised listing pages with their ETags. Keys carry the database write
+# generation, so any user/data item change misses; the TTL bounds how stale
+# another worker's copy can get.
+_list_cache = TTLCache(maxsize=256, ttl=5)
+
+
+def _list_response(request: Request, key: tuple, load) -> Response:
+    key += (get_write_generation(), )
+    cached = _list_cache.get(key)
+    if cached is None:
+        # Serialised here in one pass; response_model stays for the OpenAPI schema
+        body = dump_list_json(DataItemListAdapter, load())
+        cached = (body, f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"')
+        _list_cache[key] = cached
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
 @router.get("/", response_model=List[DataItemResponse])
 @timing_logger
-def list_data_items(skip: int = 0,
+def list_data_items(request: Request,
+                    skip: int = 0,
                     limit: int = 100,
+                    after_id: Optional[int] = None,
                     user_only: bool = True,
                     db: Session = Depends(get_db),
                     current_user: User = Depends(get_current_active_user)):
-    log_timing(f"list_data_items - starting with user_only={user_only}")
-    
-    # Ensure tables exist before proceeding
-    start_time = log_timing("list_data_items - calling ensure_tables_exist")
-    ensure_tables_exist()
-    log_timing("list_data_items - ensure_tables_exist completed", start_time)
-
-    if user_only:
-        query_start = log_timing("list_data_items - calling get_user_data_items")
-        result = get_user_data_items(db, current_user, skip, limit)
-        log_timing("list_data_items - get_user_data_items completed", query_start)
-        return result
-    else:
-        query_start = log_timing("list_data_items - calling get_all_data_items")
-        result = get_all_data_items(db, skip, limit)
-        log_timing("list_data_items - get_all_data_items completed", query_start)
+    # The branch messages below show which user_only path was taken
+    log_timing("list_data_items - starting")
+
+    def load():
+        if user_only:
+            query_start = log_timing("list_data_items - calling get_user_data_items")
+            result = get_user_data_items(db, current_user, skip, limit, after_id)
+            log_timing("list_data_items - get_user_data_items completed", query_start)
+        else:
+            query_start = log_timing("list_data_items - calling get_all_data_items")
+            result = get_all_data_items(db, skip, limit, after_id)
+            log_timing("list_data_items - get_all_data_items completed", query_start)
         return result
 
+    # Everyone's listing is the same page the public endpoint serves
+    owner = current_user.id if user_only else None
+    return _list_response(request, (owner, skip, limit, after_id), load)
+
 
 @router.get("/public", response_model=List[DataItemResponse])
-def list_public_data_items(skip: int = 0,
+def list_public_data_items(request: Request,
+                           skip: int = 0,
                            limit: int = 100,
+                           after_id: Optional[int] = None,
                            db: Session = Depends(get_db)):
     """Public endpoint that doesn't require authentication"""
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
-    return get_all_data_items(db, skip, limit)
+    return _list_response(
+        request, (None, skip, limit, after_id),
+        lambda: get_all_data_items(db, skip, limit, after_id))
 
 
 @router.get("/{item_id}", response_model=DataItemWithLineage)
 def get_data_item(item_id: int,
                   db: Session = Depends(get_db),
                   current_user: User = Depends(get_current_active_user)):
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
     data_item = get_data_item_with_lineage(db, item_id, current_user)
     if not data_item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
@@ -121,21 +204,16 @@ async def upload_metadata(request: Request,
                           username: Optional[str] = Form(None),
                           db: Session = Depends(get_db)):
     """Upload DVC metadata file to store original filename and host information"""
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
     try:
-        # Read and parse the .dvc file
-        content = await dvc_file.read()
-        dvc_content = yaml.safe_load(content)
+        # Parse the .dvc file straight from the spooled upload
+        dvc_content = yaml.load(dvc_file.file, Loader=_YamlLoader)
 
-        if not dvc_content or 'outs' not in dvc_content or len(
-                dvc_content['outs']) == 0:
+        # Extract file hash and original filename from .dvc file
+        try:
+            dvc_out = dvc_content['outs'][0]
+        except (KeyError, IndexError, TypeError):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                                 detail="Invalid .dvc file format")
-
-        # Extract file hash and original filename from .dvc file
-        dvc_out = dvc_content['outs'][0]
         file_hash = dvc_out.get('md5') or dvc_out.get('sha256')
         original_filename = dvc_out.get('path')
 
@@ -151,66 +229,37 @@ async def upload_metadata(request: Request,
         # Get client IP from request
         host_ip = request.client.host if request.client else None
 
-        # Check if metadata already exists for this file hash
-        existing_metadata = db.query(UploadedMetadata).filter(
-            UploadedMetadata.file_hash == file_hash).first()
-
-        if existing_metadata:
-            # Update existing metadata
-            existing_metadata.original_filename = original_filename  # type: ignore
-            existing_metadata.host_ip = host_ip  # type: ignore
-            existing_metadata.username = username  # type: ignore
-
-            # Check if there's a matching DataItem and update name if it's hash-based
-            data_item = db.query(DataItem).filter(
-                DataItem.hash == file_hash).first()
-            if data_item is not None:
-                item_name = str(
-                    data_item.name) if data_item.name is not None else ""
-                if item_name.startswith('dvc_file_') or item_name.startswith(
-                        'dvc_dir_'):
-                    # Update name only if it's a hash-based fallback
-                    data_item.name = original_filename  # type: ignore
-
-            db.commit()
-            db.refresh(existing_metadata)
-
-            metadata_id = int(
-                existing_metadata.id) if existing_metadata.id else 0
-            return MetadataUploadResponse(
-                message="Metadata updated successfully",
-                metadata_id=metadata_id,
-                file_hash=file_hash,
-                original_filename=original_filename)
-        else:
-            # Create new metadata record
-            metadata_record = UploadedMetadata(
-                file_hash=file_hash,
-                original_filename=original_filename,
-                host_ip=host_ip,
-                username=username)
-            db.add(metadata_record)
-
-            # Check if there's a matching DataItem and update name if it's hash-based
-            data_item = db.query(DataItem).filter(
-                DataItem.hash == file_hash).first()
-            if data_item is not None:
-                item_name = str(
-                    data_item.name) if data_item.name is not None else ""
-                if item_name.startswith('dvc_file_') or item_name.startswith(
-                        'dvc_dir_'):
-                    # Update name only if it's a hash-based fallback
-                    data_item.name = original_filename  # type: ignore
-
-            db.commit()
-            db.refresh(metadata_record)
-
-            metadata_id = int(metadata_record.id) if metadata_record.id else 0
-            return MetadataUploadResponse(
-                message="Metadata uploaded successfully",
-                metadata_id=metadata_id,
-                file_hash=file_hash,
-                original_filename=original_filename)
+        # Refresh the record for this hash in place, adding one if none exists
+        fields = dict(original_filename=original_filename,
+                      host_ip=host_ip,
+                      username=username)
+        metadata_id = db.scalars(
+            update(UploadedMetadata).where(
+                UploadedMetadata.file_hash == file_hash).values(
+                    **fields).returning(UploadedMetadata.id).execution_options(
+                        synchronize_session=False)).first()
+        created = metadata_id is None
+        if created:
+            metadata_id = db.scalar(
+                insert(UploadedMetadata).values(
+                    file_hash=file_hash, **fields).returning(UploadedMetadata.id))
+
+        # Update matching DataItem names only where they are hash-based fallbacks
+        db.execute(
+            update(DataItem).where(
+                DataItem.hash == file_hash,
+                or_(*(DataItem.name.startswith(prefix, autoescape=True)
+                      for prefix in HASH_NAME_PREFIXES))).values(
+                        name=original_filename).execution_options(
+                            synchronize_session=False))
+        db.commit()
+
+        return MetadataUploadResponse(
+            message="Metadata uploaded successfully"
+            if created else "Metadata updated successfully",
+            metadata_id=metadata_id,
+            file_hash=file_hash,
+            original_filename=original_filename)
 
     except yaml.YAMLError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
@@ -220,15 +269,12 @@ async def upload_metadata(request: Request,
                             detail=f"Failed to process metadata: {str(e)}")
 
 
-def get_dvc_file_path_from_hash(file_hash: str, storage_path: str) -> str:
+def get_dvc_file_path_from_hash(file_hash: str) -> str:
     """Get DVC file path from hash"""
     if len(file_hash) < 2:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Invalid file hash")
-    
-    hash_prefix = file_hash[:2]
-    hash_suffix = file_hash[2:]
-    return os.path.join(storage_path, "files", "md5", hash_prefix, hash_suffix)
+    return f"{DVC_FILES_DIR}/{file_hash[:2]}/{file_hash[2:]}"
 
 
 def read_dir_metadata(dir_file_path: str) -> list:
@@ -241,7 +287,7 @@ def read_dir_metadata(dir_file_path: str) -> list:
                             detail=f"Cannot read folder metadata: {str(e)}")
 
 
-def create_folder_zip(folder_name: str, file_list: list, storage_path: str) -> str:
+def create_folder_zip(folder_name: str, file_list: list) -> str:
     """Create a ZIP file containing all files from the folder"""
     temp_dir = tempfile.mkdtemp()
     zip_path = os.path.join(temp_dir, f"{folder_name}.zip")
@@ -253,15 +299,14 @@ def create_folder_zip(folder_name: str, file_list: list, storage_path: str) -> s
             
             # Get the actual file path from hash
             try:
-                actual_file_path = get_dvc_file_path_from_hash(file_hash, storage_path)
-                
-                if os.path.exists(actual_file_path):
-                    # Add file to ZIP with its relative path
-                    zipf.write(actual_file_path, rel_path)
-                else:
-                    print(f"Warning: File {rel_path} (hash: {file_hash}) not found in storage")
+                actual_file_path = get_dvc_file_path_from_hash(file_hash)
+                # Add file to ZIP with its relative path
+                zipf.write(actual_file_path, rel_path)
+            except FileNotFoundError:
+                logger.warning("File %s (hash: %s) not found in storage",
+                               rel_path, file_hash)
             except Exception as e:
-                print(f"Warning: Error processing file {rel_path}: {str(e)}")
+                logger.warning("Error processing file %s: %s", rel_path, e)
                 continue
     
     return zip_path
@@ -272,10 +317,8 @@ def download_data_file(item_id: int,
                        db: Session = Depends(get_db),
                        current_user: User = Depends(get_current_active_user)):
     """Download the actual data file"""
-    ensure_tables_exist()
-
     # Allow all users to download any data item (no user restriction)
-    data_item = db.query(DataItem).filter(DataItem.id == item_id).first()
+    data_item = db.get(DataItem, item_id)
 
     if not data_item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
@@ -286,14 +329,21 @@ def download_data_file(item_id: int,
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="File hash not found")
 
-    # Construct DVC storage path using hash
-    from ..config import config
-    storage_path = config.get_dvc_storage_path()
-    
+    # Uploads reach DVC storage only once their background push lands
+    if data_item.dvc_status == DVC_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Data item is not yet available in DVC storage",
+            headers={"Retry-After": "1"})
+    if data_item.dvc_status == DVC_FAILED:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Data item could not be pushed to DVC storage")
+
     # Check if this is a folder
     if data_item.is_folder and str(data_item.hash).endswith('.dir'):
         # Handle folder download - create ZIP file
-        dir_file_path = get_dvc_file_path_from_hash(str(data_item.hash), storage_path)
+        dir_file_path = get_dvc_file_path_from_hash(str(data_item.hash))
         
         if not os.path.exists(dir_file_path):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
@@ -303,57 +353,79 @@ def download_data_file(item_id: int,
         file_list = read_dir_metadata(dir_file_path)
         
         # Create ZIP file
-        zip_path = create_folder_zip(str(data_item.name), file_list, storage_path)
+        zip_path = create_folder_zip(str(data_item.name), file_list)
         
         try:
+            # FileResponse streams via sendfile; drop the temp dir once sent
             return FileResponse(
                 path=zip_path,
                 filename=f"{str(data_item.name)}.zip",
-                media_type='application/zip'
+                media_type='application/zip',
+                background=BackgroundTask(shutil.rmtree,
+                                          os.path.dirname(zip_path),
+                                          ignore_errors=True)
             )
         except Exception as e:
             # Clean up temp file if something goes wrong
-            import shutil
             if os.path.exists(zip_path):
                 os.unlink(zip_path)
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                                 detail=f"Failed to create folder download: {str(e)}")
     else:
         # Handle single file download (original logic)
-        if len(str(data_item.hash)) < 2:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                                detail="Invalid file hash")
-
         # Build path: /opt/dvc_storage/files/md5/{first_two_chars}/{remaining_hash}
-        dvc_file_path = get_dvc_file_path_from_hash(str(data_item.hash), storage_path)
+        dvc_file_path = get_dvc_file_path_from_hash(str(data_item.hash))
 
-        # Verify file exists in DVC storage
-        if not os.path.exists(dvc_file_path):
+        # Verify file exists in DVC storage; the stat is reused by FileResponse
+        try:
+            file_stat = os.stat(dvc_file_path)
+        except FileNotFoundError:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                 detail="File not found in DVC storage")
 
+        filename = str(data_item.name)
+        if data_item.is_folder:
+            # Folder that was packed into a single tar at upload time
+            filename += '.tar'
+
         # Determine media type based on file extension
-        from pathlib import Path
-        file_extension = Path(str(data_item.name)).suffix.lower()
-        media_type = {
-            '.csv': 'text/csv',
-            '.json': 'application/json',
-            '.txt': 'text/plain',
-            '.xlsx':
-            'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            '.parquet': 'application/octet-stream',
-            '.h5': 'application/octet-stream',
-            '.pkl': 'application/octet-stream',
-            '.py': 'text/plain',
-            '.ipynb': 'application/json',
-            '.zip': 'application/zip',
-        }.get(file_extension, 'application/octet-stream')
-
-        # Serve file with original filename from database
+        file_extension = os.path.splitext(filename)[1].lower()
+        media_type = MEDIA_TYPES.get(file_extension, 'application/octet-stream')
+
+        # Serve file with original filename from database. FileResponse
+        # sets Content-Length from the stat, advertises Accept-Ranges and
+        # answers Range requests, so interrupted downloads can resume
         return FileResponse(
             path=dvc_file_path,
-            filename=str(data_item.name),  # Use original name from database
-            media_type=media_type)
+            filename=filename,  # Use original name from database
+            media_type=media_type,
+            stat_result=file_stat)
+
+
+@functools.lru_cache(maxsize=1024)
+def _build_dvc_yaml(file_hash: str, size: Optional[int], path: str,
+                    nfiles: Optional[int]) -> str:
+    """Render .dvc content; ``nfiles`` is None for single files"""
+    out = {'md5': file_hash, 'size': size, 'hash': 'md5', 'path': path}
+    if nfiles is not None:
+        out['nfiles'] = nfiles
+    return yaml.dump({'outs': [out]},
+                     Dumper=_YamlDumper,
+                     default_flow_style=False,
+                     sort_keys=False)
+
+
+def _dvc_yaml_for(data_item: DataItem) -> str:
+    """Generate an item's .dvc content from its database row"""
+    file_hash = str(data_item.hash)
+    if file_hash.endswith('.dir'):
+        # A directory output
+        return _build_dvc_yaml(file_hash, data_item.file_size, data_item.name,
+                               data_item.file_count or 1)
+    # Single files, and folders packed into one tar at upload time, which are
+    # a single tar output named as download_data_file serves it
+    path = f"{data_item.name}.tar" if data_item.is_folder else data_item.name
+    return _build_dvc_yaml(file_hash, data_item.file_size, path, None)
 
 
 @router.get("/{item_id}/dvc-file")
@@ -361,10 +433,8 @@ def download_dvc_file(item_id: int,
                       db: Session = Depends(get_db),
                       current_user: User = Depends(get_current_active_user)):
     """Download .dvc file (generated from database)"""
-    ensure_tables_exist()
-
     # Allow all users to download any DVC file (no user restriction)
-    data_item = db.query(DataItem).filter(DataItem.id == item_id).first()
+    data_item = db.get(DataItem, item_id)
 
     if not data_item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
@@ -374,51 +444,16 @@ def download_dvc_file(item_id: int,
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="File hash not found in database")
 
-    # Generate .dvc content dynamically from database
-    import yaml
-    from io import StringIO
-
-    # Build DVC content structure
-    dvc_content = {
-        'outs': [{
-            'md5': data_item.hash,
-            'size': data_item.file_size,
-            'hash': 'md5',
-            'path': data_item.name
-        }]
-    }
-
-    # Add folder-specific fields if it's a folder
-    if data_item.is_folder:
-        dvc_content['outs'][0]['nfiles'] = data_item.file_count or 1
-
-    # Convert to YAML string
-    yaml_content = yaml.dump(dvc_content,
-                             default_flow_style=False,
-                             sort_keys=False)
-
-    # Create a temporary file-like object to serve
-    from tempfile import NamedTemporaryFile
-    import tempfile
-
-    with NamedTemporaryFile(mode='w',
-                            suffix='.dvc',
-                            delete=False,
-                            encoding='utf-8') as temp_file:
-        temp_file.write(yaml_content)
-        temp_file_path = temp_file.name
-
-    try:
-        return FileResponse(path=temp_file_path,
-                            filename=data_item.name + ".dvc",
-                            media_type='text/yaml')
-    except Exception as e:
-        # Clean up temp file if something goes wrong
-        import os
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            detail=f"Failed to serve DVC file: {str(e)}")
+    # Generated in memory; a few hundred bytes never need a temp file
+    filename = data_item.name + ".dvc"
+    quoted = quote(filename)
+    if quoted != filename:
+        disposition = f"attachment; filename*=utf-8''{quoted}"
+    else:
+        disposition = f'attachment; filename="{filename}"'
+    return Response(content=_dvc_yaml_for(data_item),
+                    media_type='text/yaml',
+                    headers={'Content-Disposition': disposition})
 
 
 @router.get("/{item_id}/dvc-content")
@@ -426,10 +461,8 @@ def get_dvc_content(item_id: int,
                     db: Session = Depends(get_db),
                     current_user: User = Depends(get_current_active_user)):
     """Get .dvc file content as text (generated from database)"""
-    ensure_tables_exist()
-
     # Allow all users to access any DVC content (no user restriction)
-    data_item = db.query(DataItem).filter(DataItem.id == item_id).first()
+    data_item = db.get(DataItem, item_id)
 
     if not data_item:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
@@ -439,29 +472,7 @@ def get_dvc_content(item_id: int,
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="File hash not found in database")
 
-    # Generate .dvc content dynamically from database
-    import yaml
-
-    # Build DVC content structure
-    dvc_content = {
-        'outs': [{
-            'md5': data_item.hash,
-            'size': data_item.file_size,
-            'hash': 'md5',
-            'path': data_item.name
-        }]
-    }
-
-    # Add folder-specific fields if it's a folder
-    if data_item.is_folder:
-        dvc_content['outs'][0]['nfiles'] = data_item.file_count or 1
-
-    # Convert to YAML string
-    yaml_content = yaml.dump(dvc_content,
-                             default_flow_style=False,
-                             sort_keys=False)
-
-    return Response(content=yaml_content, media_type='text/plain')
+    return Response(content=_dvc_yaml_for(data_item), media_type='text/plain')
 
 
 @router.delete("/{item_id}", response_model=DeleteResponse)
@@ -469,26 +480,15 @@ def delete_data_item(item_id: int,
                      db: Session = Depends(get_db),
                      current_user: User = Depends(get_current_active_user)):
     """Delete a data item (only if owned by the current user)"""
-    ensure_tables_exist()
-
-    # Get the data item
-    data_item = db.query(DataItem).filter(DataItem.id == item_id).first()
-    if not data_item:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail="Data item not found")
-
-    # Check if user owns this item
-    if data_item.user_id != current_user.id:
+    item_name = delete_data_item_row(db, item_id, owner_id=current_user.id)
+    if item_name is None:
+        # Only a failed delete pays for telling missing from not-owned
+        if db.get(DataItem, item_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail="Data item not found")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                             detail="You can only delete your own data items")
 
-    # Store item info for response
-    item_name = str(data_item.name)
-
-    # Delete the data item (this will cascade delete related records)
-    db.delete(data_item)
-    db.commit()
-
     return DeleteResponse(
         message=f"Data item '{item_name}' deleted successfully",
         item_id=item_id,
@@ -2,17 +2,25 @@ from fastapi import APIRouter, Request, Response, HTTPException, status, Depends
 from fastapi.responses import FileResponse
 from typing import Optional, List, Dict, Any
 import os
+from stat import S_ISREG
 import hashlib
+import logging
 import base64
 from pathlib import Path
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from ..config import config
-from ..database import get_db, ensure_tables_exist
-from ..dvc_auth import verify_dvc_auth
+from ..database import get_db, release_connection
+from ..dvc_auth import verify_dvc_auth_async
 from ..schemas import DVCFileResponse, DVCUploadResponse, DVCUserInfo
 import yaml
 from datetime import datetime
-from ..database import DataItem, User
+from ..database import DataItem, UploadedMetadata, User
+
+logger = logging.getLogger(__name__)
+
+# libyaml-backed loader when PyYAML was built with it
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
 
 router = APIRouter()
 
@@ -80,12 +88,14 @@ def extract_metadata_from_dvc_file(dvc_file_path: Path) -> Dict[str, Any]:
     try:
         if dvc_file_path.exists():
             with open(dvc_file_path, 'r') as f:
-                dvc_content = yaml.safe_load(f)
+                dvc_content = yaml.load(f, Loader=_YamlLoader)
 
-            if dvc_content and 'outs' in dvc_content and len(
-                    dvc_content['outs']) > 0:
+            try:
                 dvc_out = dvc_content['outs'][0]
-                
+            except (KeyError, IndexError, TypeError):
+                dvc_out = None
+
+            if dvc_out:
                 # Extract original filename
                 original_path = dvc_out.get('path')
                 if original_path:
@@ -136,12 +146,12 @@ def extract_metadata_from_db_and_dvc(file_hash: str, db: Session) -> Dict[str, A
 
     try:
         # Query the uploaded_metadata table for this file hash
-        from ..database import UploadedMetadata
-        uploaded_meta = db.query(UploadedMetadata).filter(
-            UploadedMetadata.file_hash == file_hash).first()
+        original_filename = db.scalar(
+            select(UploadedMetadata.original_filename).where(
+                UploadedMetadata.file_hash == file_hash).limit(1))
 
-        if uploaded_meta:
-            metadata['original_filename'] = uploaded_meta.original_filename
+        if original_filename is not None:
+            metadata['original_filename'] = original_filename
 
             # Check if this is a directory by looking for .dir extension in the hash
             if file_hash.endswith('.dir'):
@@ -211,7 +221,7 @@ def handle_dvc_upload_data_item_creation(file_path: str, full_path: Path,
 
     except Exception as e:
         # Log error but don't fail the upload
-        print(f"Error creating DataItem record: {e}")
+        logger.error("Error creating DataItem record: %s", e)
 
     return None
 
@@ -281,11 +291,8 @@ async def get_dvc_file(file_path: str,
                         x_dvc_token: Optional[str] = Header(None),
                         db: Session = Depends(get_db)):
     """Serve DVC files for download"""
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
     # Verify authentication and get user
-    user = verify_dvc_auth(authorization, x_dvc_token, db)
+    user = await verify_dvc_auth_async(authorization, x_dvc_token, db)
 
     # Check if this is a DVC hash path or regular file path
     if is_dvc_hash_path(file_path):
@@ -311,16 +318,20 @@ async def get_dvc_file(file_path: str,
 
         full_path = storage_path / safe_path
 
-    if not full_path.exists():
+    # One stat answers both checks and is handed on to FileResponse
+    try:
+        file_stat = full_path.stat()
+    except FileNotFoundError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="File not found")
 
-    if not full_path.is_file():
+    if not S_ISREG(file_stat.st_mode):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Not a file")
 
     return FileResponse(path=str(full_path),
                         filename=full_path.name,
+                        stat_result=file_stat,
                         headers={
                             'Content-Disposition':
                             f'attachment; filename="{full_path.name}"'
@@ -334,11 +345,10 @@ async def upload_dvc_file(file_path: str,
                           x_dvc_token: Optional[str] = Header(None),
                           db: Session = Depends(get_db)):
     """Handle DVC file uploads"""
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
     # Verify authentication and get user
-    user = verify_dvc_auth(authorization, x_dvc_token, db)
+    user = await verify_dvc_auth_async(authorization, x_dvc_token, db)
+    # Don't hold a pooled connection while the body is received
+    release_connection(db)
 
     # Check if this is a DVC hash path or regular file path
     if is_dvc_hash_path(file_path):
@@ -379,7 +389,7 @@ async def upload_dvc_file(file_path: str,
                                                  db)
         except Exception as e:
             # Log error but don't fail the upload
-            print(f"Error creating DataItem record: {e}")
+            logger.error("Error creating DataItem record: %s", e)
 
     return DVCUploadResponse(status="success",
                              path=file_path,
@@ -393,9 +403,6 @@ async def post_dvc_file(file_path: str,
                         x_dvc_token: Optional[str] = Header(None),
                         db: Session = Depends(get_db)):
     """Handle DVC file uploads via POST"""
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
     return await upload_dvc_file(file_path, request, authorization,
                                  x_dvc_token, db)
 
@@ -406,11 +413,8 @@ async def head_dvc_file(file_path: str,
                         x_dvc_token: Optional[str] = Header(None),
                         db: Session = Depends(get_db)):
     """Check if DVC file exists and return metadata"""
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
     # Verify authentication and get user
-    user = verify_dvc_auth(authorization, x_dvc_token, db)
+    user = await verify_dvc_auth_async(authorization, x_dvc_token, db)
 
     # Check if this is a DVC hash path or regular file path
     if is_dvc_hash_path(file_path):
@@ -457,10 +461,7 @@ async def get_user_info(authorization: Optional[str] = Header(None),
                         x_dvc_token: Optional[str] = Header(None),
                         db: Session = Depends(get_db)):
     """Get current authenticated user information"""
-    # Ensure tables exist before proceeding
-    ensure_tables_exist()
-
-    user = verify_dvc_auth(authorization, x_dvc_token, db)
+    user = await verify_dvc_auth_async(authorization, x_dvc_token, db)
 
     if not user:
         return DVCUserInfo(authenticated=False)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, TypeAdapter
 from typing import Optional, List
 from datetime import datetime
 
@@ -54,6 +54,8 @@ class DataItemResponse(DataItemBase):
     file_type: Optional[str] = None
     is_folder: Optional[bool] = False
     file_count: Optional[int] = None
+    # pending until the upload reaches DVC storage, then pushed or failed
+    dvc_status: str = "pushed"
     user_id: int
     created_at: datetime
     user: UserResponse
@@ -121,3 +123,13 @@ class GCResponse(BaseModel):
     message: str
     files_deleted: int
     space_freed: int  # in bytes
+
+
+# Whole-page validators for the list endpoints, built once at import
+UserListAdapter = TypeAdapter(List[UserResponse])
+DataItemListAdapter = TypeAdapter(List[DataItemResponse])
+
+
+def dump_list_json(adapter: TypeAdapter, rows) -> bytes:
+    """Validate ORM rows and encode them as JSON in a single pydantic-core pass"""
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
@@ -37,6 +37,14 @@ def _get_timing_debug_log_level() -> str:
     return _timing_debug_log_level
 
 
+def _emit(message: str, *args: Any) -> None:
+    """Log a TIMING line at the configured level."""
+    level = logging.getLevelName(_get_timing_debug_log_level())
+    if not isinstance(level, int):
+        level = logging.INFO
+    logger.log(level, "TIMING: " + message, *args)
+
+
 def timing_logger(func: Optional[Callable] = None, *, name: Optional[str] = None) -> Callable:
     """
     Decorator to log function execution time when timing debug is enabled.
@@ -55,28 +63,17 @@ def timing_logger(func: Optional[Callable] = None, *, name: Optional[str] = None
         
         @functools.wraps(f)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_time = time.perf_counter()
             func_name = name or getattr(f, '__name__', 'unknown_function')
             
             try:
                 result = f(*args, **kwargs)
-                end_time = time.time()
-                duration = end_time - start_time
-                
-                # Use the configured log level
-                log_level = _get_timing_debug_log_level()
-                if log_level == 'DEBUG':
-                    logger.debug(f"TIMING: {func_name} took {duration:.4f}s")
-                elif log_level == 'WARNING':
-                    logger.warning(f"TIMING: {func_name} took {duration:.4f}s")
-                else:  # INFO or default
-                    logger.info(f"TIMING: {func_name} took {duration:.4f}s")
-                
+                _emit("%s took %.4fs", func_name,
+                      time.perf_counter() - start_time)
                 return result
             except Exception as e:
-                end_time = time.time()
-                duration = end_time - start_time
-                logger.error(f"TIMING: {func_name} failed after {duration:.4f}s: {e}")
+                logger.error("TIMING: %s failed after %.4fs: %s", func_name,
+                             time.perf_counter() - start_time, e)
                 raise
         
         return wrapper
@@ -97,30 +94,17 @@ def log_timing(message: str, start_time: Optional[float] = None) -> float:
         start_time: If provided, calculates duration from this time
         
     Returns:
-        Current time (can be used as start_time for next call)
+        Current perf_counter() reading (can be used as start_time for next
+        call), or 0.0 without reading the clock when timing debug is disabled
     """
     if not _is_timing_debug_enabled():
-        return time.time()
-    
-    current_time = time.time()
-    
+        return 0.0
+
+    current_time = time.perf_counter()
     if start_time is not None:
-        duration = current_time - float(start_time)
-        log_level = _get_timing_debug_log_level()
-        if log_level == 'DEBUG':
-            logger.debug(f"TIMING: {message} took {duration:.4f}s")
-        elif log_level == 'WARNING':
-            logger.warning(f"TIMING: {message} took {duration:.4f}s")
-        else:  # INFO or default
-            logger.info(f"TIMING: {message} took {duration:.4f}s")
+        _emit("%s took %.4fs", message, current_time - float(start_time))
     else:
-        log_level = _get_timing_debug_log_level()
-        if log_level == 'DEBUG':
-            logger.debug(f"TIMING: {message}")
-        elif log_level == 'WARNING':
-            logger.warning(f"TIMING: {message}")
-        else:  # INFO or default
-            logger.info(f"TIMING: {message}")
+        _emit("%s", message)
     
     return current_time
 
@@ -142,28 +126,16 @@ class TimingBlock:
     
     def __enter__(self):
         if _is_timing_debug_enabled():
-            self.start_time = time.time()
-            log_level = _get_timing_debug_log_level()
-            if log_level == 'DEBUG':
-                logger.debug(f"TIMING: {self.name} - starting")
-            elif log_level == 'WARNING':
-                logger.warning(f"TIMING: {self.name} - starting")
-            else:  # INFO or default
-                logger.info(f"TIMING: {self.name} - starting")
+            self.start_time = time.perf_counter()
+            _emit("%s - starting", self.name)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         if _is_timing_debug_enabled() and self.start_time is not None:
-            end_time = time.time()
-            duration = end_time - self.start_time
+            duration = time.perf_counter() - self.start_time
             
             if exc_type is not None:
-                logger.error(f"TIMING: {self.name} failed after {duration:.4f}s: {exc_val}")
+                logger.error("TIMING: %s failed after %.4fs: %s", self.name,
+                             duration, exc_val)
             else:
-                log_level = _get_timing_debug_log_level()
-                if log_level == 'DEBUG':
-                    logger.debug(f"TIMING: {self.name} completed in {duration:.4f}s")
-                elif log_level == 'WARNING':
-                    logger.warning(f"TIMING: {self.name} completed in {duration:.4f}s")
-                else:  # INFO or default
-                    logger.info(f"TIMING: {self.name} completed in {duration:.4f}s")
\ No newline at end of file
+                _emit("%s completed in %.4fs", self.name, duration)
\ No newline at end of file
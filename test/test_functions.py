@@ -32,6 +32,14 @@ class TestDVCConfig:
         assert 'enabled' in remote_config
         assert 'auth' in remote_config
 
+    def test_only_one_config_module(self):
+        """Test that a single Config module backs every importer"""
+        import importlib.util
+        spec = importlib.util.find_spec('backend.config')
+        assert spec is not None and spec.origin.endswith('config.py')
+        assert len(list(Path(spec.origin).parent.glob('config*.py'))) == 1
+        assert config.dvc is config.dvc_config
+
 
 class TestPathFunctions:
     """Test path manipulation functions"""
@@ -242,3 +250,277 @@ class TestDownloadFeatures:
                               db=db_session,
                               current_user=test_params['user'])
         assert result is not None
+
+
+class TestTTLCache:
+    """Test the in-process TTL cache"""
+
+    def test_get_set_and_expiry(self, monkeypatch):
+        """Entries are returned until their TTL elapses"""
+        from backend.utils import cache as cache_module
+        now = [1000.0]
+        monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+        cache = cache_module.TTLCache(maxsize=2, ttl=10)
+        cache['a'] = 1
+        assert cache.get('a') == 1
+        now[0] += 11
+        assert cache.get('a') is None
+
+    def test_lru_eviction(self):
+        """Least recently used entry is evicted when full"""
+        from backend.utils.cache import TTLCache
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache['a'] = 1
+        cache['b'] = 2
+        cache.get('a')
+        cache['c'] = 3
+        assert 'a' in cache
+        assert 'b' not in cache
+        assert cache.pop('c') == 3
+
+
+class TestAccessTokens:
+    """Test JWT creation and decoding"""
+
+    def test_access_token_round_trip(self):
+        """Claims survive encode/decode with whichever JSON codec is active"""
+        from backend.auth import (create_access_token, _jose, _SECRET_BYTES,
+                                  _ALGORITHMS, _DECODE_OPTIONS)
+        token = create_access_token({"sub": "pytest@hillstonenet.com"})
+        jwt, _ = _jose()
+        payload = jwt.decode(token,
+                             _SECRET_BYTES,
+                             algorithms=_ALGORITHMS,
+                             options=_DECODE_OPTIONS)
+        assert payload["sub"] == "pytest@hillstonenet.com"
+        assert isinstance(payload["exp"], int)
+
+
+class TestGarbageCollection:
+    """Test the admin GC sweep of the DVC cache"""
+
+    def test_sweep_keeps_referenced_and_manifest_files(self, tmp_path):
+        """Unreferenced objects go; referenced ones and folder members stay"""
+        import json
+        from backend.routers.admin import _referenced_hashes, _scan_md5_shards
+
+        def put(file_hash, content=b"x"):
+            path = tmp_path / file_hash[:2] / file_hash[2:]
+            path.parent.mkdir(exist_ok=True)
+            path.write_bytes(content)
+            return path
+
+        kept = put("aa" + "1" * 30)
+        member = put("bb" + "2" * 30)
+        orphan = put("aa" + "3" * 30, b"orphan")
+        lone_orphan = put("cc" + "4" * 30, b"lone")
+        folder_hash = "dd" + "5" * 30 + ".dir"
+        manifest = put(folder_hash, json.dumps(
+            [{"md5": "bb" + "2" * 30, "relpath": "a.txt"}]).encode())
+
+        referenced = _referenced_hashes(str(tmp_path),
+                                        ["aa" + "1" * 30, folder_hash])
+        files_deleted, space_freed = _scan_md5_shards(str(tmp_path),
+                                                      referenced)
+
+        assert files_deleted == 2
+        assert space_freed == len(b"orphan") + len(b"lone")
+        assert kept.exists() and member.exists() and manifest.exists()
+        assert not orphan.exists()
+        assert not lone_orphan.exists()
+        assert not (tmp_path / "cc").exists()
+
+
+class TestUploadPaths:
+    """Test that upload file names cannot escape the upload directory"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        """A client whose uploads land under tmp_path/uploads"""
+        from fastapi.testclient import TestClient
+        from backend import dvc_service
+        from backend.auth import get_current_active_user
+        from backend.main import app
+        monkeypatch.setattr(dvc_service, 'UPLOAD_DIR',
+                            str(tmp_path / "uploads"))
+        monkeypatch.setattr(dvc_service, 'ensure_dvc_repo', lambda: None)
+        user = User(id=424242, email="pytest@hillstonenet.com",
+                    is_admin=False)
+        app.dependency_overrides[get_current_active_user] = lambda: user
+        try:
+            yield TestClient(app)
+        finally:
+            app.dependency_overrides.pop(get_current_active_user, None)
+
+    @staticmethod
+    def _written_outside_uploads(tmp_path):
+        uploads = tmp_path / "uploads"
+        return [p for p in tmp_path.rglob('*')
+                if p.is_file() and uploads not in p.parents]
+
+    @pytest.mark.parametrize("filename", [
+        "../escape.txt",
+        "../../escape.txt",
+        "nested/../../escape.txt",
+    ])
+    def test_stream_upload_rejects_parent_dirs(self, client, tmp_path,
+                                               filename):
+        """../ in a streamed file name is a 400 and writes nothing"""
+        response = client.post("/api/data/upload-stream",
+                               params={"filename": filename,
+                                       "source": "pytest"},
+                               content=b"payload")
+        assert response.status_code == 400
+        assert self._written_outside_uploads(tmp_path) == []
+        assert not list((tmp_path / "uploads").rglob('*.txt'))
+
+    def test_stream_upload_rejects_absolute_name(self, client, tmp_path):
+        """An absolute file name is a 400 and the target is not created"""
+        target = tmp_path / "absolute.txt"
+        response = client.post("/api/data/upload-stream",
+                               params={"filename": str(target),
+                                       "source": "pytest"},
+                               content=b"payload")
+        assert response.status_code == 400
+        assert not target.exists()
+        assert self._written_outside_uploads(tmp_path) == []
+
+    def test_folder_upload_rejects_parent_dirs(self, client, tmp_path):
+        """A folder upload whose names climb out of it is a 400"""
+        files = [("files", ("../escape/a.txt", b"a", "text/plain")),
+                 ("files", ("../escape/b.txt", b"b", "text/plain"))]
+        response = client.post("/api/data/upload", files=files,
+                               data={"source": "pytest"})
+        assert response.status_code == 400
+        assert self._written_outside_uploads(tmp_path) == []
+        assert not list((tmp_path / "uploads").rglob('*.txt'))
+
+
+class TestListingETags:
+    """Test conditional GETs on the data item listings"""
+
+    @pytest.fixture
+    def db_session(self):
+        """Create a test database session"""
+        from backend.database import create_tables
+        create_tables()
+        db = next(get_db())
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @pytest.fixture
+    def owner(self, db_session):
+        """A user owning the items listed in the test, removed afterwards"""
+        user = User(email="pytest-etag@hillstonenet.com",
+                    hashed_password="test_password_hash",
+                    is_admin=False)
+        db_session.add(user)
+        db_session.commit()
+        yield user
+        db_session.query(DataItem).filter(
+            DataItem.user_id == user.id).delete()
+        db_session.delete(user)
+        db_session.commit()
+
+    def test_etag_revalidation(self, db_session, owner):
+        """304 while nothing changes; insert, update and delete give a new ETag"""
+        from fastapi.testclient import TestClient
+        from backend.main import app
+        client = TestClient(app)
+
+        def add_item(name):
+            item = DataItem(name=name, source="pytest", file_path=name,
+                            user_id=owner.id)
+            db_session.add(item)
+            db_session.commit()
+            return item
+
+        first = add_item("etag-first.txt")
+        # Start the page at our own item so the changes below fall inside it
+        params = {"after_id": first.id - 1}
+
+        def get(etag=None):
+            headers = {"If-None-Match": etag} if etag else {}
+            return client.get("/api/data/public", params=params,
+                              headers=headers)
+
+        response = get()
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert get(etag).status_code == 304
+        assert get(etag).status_code == 304
+
+        def assert_changed(etag):
+            response = get(etag)
+            assert response.status_code == 200
+            assert response.headers["ETag"] != etag
+            assert get(response.headers["ETag"]).status_code == 304
+            return response.headers["ETag"]
+
+        second = add_item("etag-second.txt")
+        etag = assert_changed(etag)
+
+        first.description = "updated"
+        db_session.commit()
+        etag = assert_changed(etag)
+
+        db_session.delete(second)
+        db_session.commit()
+        assert_changed(etag)
+
+
+class TestKeysetPagination:
+    """Test after_id paging of the data item listings"""
+
+    @pytest.fixture
+    def db_session(self):
+        """Create a test database session"""
+        from backend.database import create_tables
+        create_tables()
+        db = next(get_db())
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @pytest.fixture
+    def owner(self, db_session):
+        """A user owning the paged items, removed afterwards"""
+        user = User(email="pytest-pages@hillstonenet.com",
+                    hashed_password="test_password_hash",
+                    is_admin=False)
+        db_session.add(user)
+        db_session.commit()
+        yield user
+        db_session.query(DataItem).filter(
+            DataItem.user_id == user.id).delete()
+        db_session.delete(user)
+        db_session.commit()
+
+    def test_walk_pages_with_shared_created_at(self, db_session, owner):
+        """Every item is seen exactly once, even when timestamps tie"""
+        from datetime import datetime
+        from backend.dvc_service import get_user_data_items
+        created_at = datetime(2024, 1, 1, 12, 0, 0)
+        items = [DataItem(name=f"page-{i}.txt", source="pytest",
+                          file_path=f"page-{i}.txt", user_id=owner.id,
+                          created_at=created_at)
+                 for i in range(7)]
+        db_session.add_all(items)
+        db_session.commit()
+        expected = sorted(item.id for item in items)
+
+        seen = []
+        after_id = 0
+        while True:
+            page = get_user_data_items(db_session, owner, limit=3,
+                                       after_id=after_id)
+            if not page:
+                break
+            assert len(page) <= 3
+            seen.extend(item.id for item in page)
+            after_id = page[-1].id
+
+        assert seen == expected